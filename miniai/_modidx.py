@@ -9,15 +9,53 @@ d = { 'settings': { 'branch': 'master',
                               'miniai.accel.AccelerateCB.__init__': ('ddpm_v2.html#acceleratecb.__init__', 'miniai/accel.py'),
                               'miniai.accel.AccelerateCB.backward': ('ddpm_v2.html#acceleratecb.backward', 'miniai/accel.py'),
                               'miniai.accel.AccelerateCB.before_fit': ('ddpm_v2.html#acceleratecb.before_fit', 'miniai/accel.py'),
+                              'miniai.accel.CompileCB': ('ddpm_v2.html#compilecb', 'miniai/accel.py'),
+                              'miniai.accel.CompileCB.__init__': ('ddpm_v2.html#compilecb.__init__', 'miniai/accel.py'),
+                              'miniai.accel.CompileCB._cache_path': ('ddpm_v2.html#compilecb._cache_path', 'miniai/accel.py'),
+                              'miniai.accel.CompileCB._make': ('ddpm_v2.html#compilecb._make', 'miniai/accel.py'),
+                              'miniai.accel.CompileCB.after_fit': ('ddpm_v2.html#compilecb.after_fit', 'miniai/accel.py'),
+                              'miniai.accel.CompileCB.before_fit': ('ddpm_v2.html#compilecb.before_fit', 'miniai/accel.py'),
+                              'miniai.accel.CompileCB.cleanup_fit': ('ddpm_v2.html#compilecb.cleanup_fit', 'miniai/accel.py'),
+                              'miniai.accel.DDPCB': ('ddpm_v2.html#ddpcb', 'miniai/accel.py'),
+                              'miniai.accel.DDPCB.__init__': ('ddpm_v2.html#ddpcb.__init__', 'miniai/accel.py'),
+                              'miniai.accel.DDPCB.before_epoch': ('ddpm_v2.html#ddpcb.before_epoch', 'miniai/accel.py'),
+                              'miniai.accel.DDPCB.before_fit': ('ddpm_v2.html#ddpcb.before_fit', 'miniai/accel.py'),
+                              'miniai.accel.DDPCB.cleanup_fit': ('ddpm_v2.html#ddpcb.cleanup_fit', 'miniai/accel.py'),
                               'miniai.accel.MixedPrecision': ('ddpm_v2.html#mixedprecision', 'miniai/accel.py'),
+                              'miniai.accel.MixedPrecision.__init__': ('ddpm_v2.html#mixedprecision.__init__', 'miniai/accel.py'),
+                              'miniai.accel.MixedPrecision._enter': ('ddpm_v2.html#mixedprecision._enter', 'miniai/accel.py'),
+                              'miniai.accel.MixedPrecision._exit': ('ddpm_v2.html#mixedprecision._exit', 'miniai/accel.py'),
                               'miniai.accel.MixedPrecision.after_loss': ('ddpm_v2.html#mixedprecision.after_loss', 'miniai/accel.py'),
                               'miniai.accel.MixedPrecision.backward': ('ddpm_v2.html#mixedprecision.backward', 'miniai/accel.py'),
                               'miniai.accel.MixedPrecision.before_batch': ('ddpm_v2.html#mixedprecision.before_batch', 'miniai/accel.py'),
                               'miniai.accel.MixedPrecision.before_fit': ('ddpm_v2.html#mixedprecision.before_fit', 'miniai/accel.py'),
-                              'miniai.accel.MixedPrecision.step': ('ddpm_v2.html#mixedprecision.step', 'miniai/accel.py')},
+                              'miniai.accel.MixedPrecision.before_micro_batch': ( 'ddpm_v2.html#mixedprecision.before_micro_batch',
+                                                                                  'miniai/accel.py'),
+                              'miniai.accel.MixedPrecision.cleanup_batch': ('ddpm_v2.html#mixedprecision.cleanup_batch', 'miniai/accel.py'),
+                              'miniai.accel.MixedPrecision.step': ('ddpm_v2.html#mixedprecision.step', 'miniai/accel.py'),
+                              'miniai.accel._Compiled': ('ddpm_v2.html#_compiled', 'miniai/accel.py'),
+                              'miniai.accel._Compiled.__init__': ('ddpm_v2.html#_compiled.__init__', 'miniai/accel.py'),
+                              'miniai.accel._Compiled._first': ('ddpm_v2.html#_compiled._first', 'miniai/accel.py'),
+                              'miniai.accel._Compiled.forward': ('ddpm_v2.html#_compiled.forward', 'miniai/accel.py'),
+                              'miniai.accel._ddp_worker': ('ddpm_v2.html#_ddp_worker', 'miniai/accel.py'),
+                              'miniai.accel._free_port': ('ddpm_v2.html#_free_port', 'miniai/accel.py'),
+                              'miniai.accel._model_key': ('ddpm_v2.html#_model_key', 'miniai/accel.py'),
+                              'miniai.accel._n_graphs': ('ddpm_v2.html#_n_graphs', 'miniai/accel.py'),
+                              'miniai.accel._shard': ('ddpm_v2.html#_shard', 'miniai/accel.py'),
+                              'miniai.accel.ddp_fit': ('ddpm_v2.html#ddp_fit', 'miniai/accel.py')},
             'miniai.activations': { 'miniai.activations.ActivationStatsCB': ('activations.html#activationstatscb', 'miniai/activations.py'),
                                     'miniai.activations.ActivationStatsCB.__init__': ( 'activations.html#activationstatscb.__init__',
                                                                                        'miniai/activations.py'),
+                                    'miniai.activations.ActivationStatsCB._dev_stats': ( 'activations.html#activationstatscb._dev_stats',
+                                                                                         'miniai/activations.py'),
+                                    'miniai.activations.ActivationStatsCB.after_batch': ( 'activations.html#activationstatscb.after_batch',
+                                                                                          'miniai/activations.py'),
+                                    'miniai.activations.ActivationStatsCB.after_fit': ( 'activations.html#activationstatscb.after_fit',
+                                                                                        'miniai/activations.py'),
+                                    'miniai.activations.ActivationStatsCB.before_batch': ( 'activations.html#activationstatscb.before_batch',
+                                                                                           'miniai/activations.py'),
+                                    'miniai.activations.ActivationStatsCB.before_fit': ( 'activations.html#activationstatscb.before_fit',
+                                                                                         'miniai/activations.py'),
                                     'miniai.activations.ActivationStatsCB.color_dim': ( 'activations.html#activationstatscb.color_dim',
                                                                                         'miniai/activations.py'),
                                     'miniai.activations.ActivationStatsCB.dead_chart': ( 'activations.html#activationstatscb.dead_chart',
@@ -48,11 +86,29 @@ d = { 'settings': { 'branch': 'master',
                                                                                     'miniai/activations.py'),
                                     'miniai.activations.HooksCallback.before_fit': ( 'activations.html#hookscallback.before_fit',
                                                                                      'miniai/activations.py'),
+                                    'miniai.activations._hists': ('activations.html#_hists', 'miniai/activations.py'),
                                     'miniai.activations.append_stats': ('activations.html#append_stats', 'miniai/activations.py'),
                                     'miniai.activations.get_hist': ('activations.html#get_hist', 'miniai/activations.py'),
                                     'miniai.activations.get_min': ('activations.html#get_min', 'miniai/activations.py'),
                                     'miniai.activations.set_seed': ('activations.html#set_seed', 'miniai/activations.py')},
-            'miniai.augment': { 'miniai.augment.CapturePreds': ('augment.html#capturepreds', 'miniai/augment.py'),
+            'miniai.augment': { 'miniai.augment.AugmentCB': ('augment.html#augmentcb', 'miniai/augment.py'),
+                                'miniai.augment.AugmentCB.__init__': ('augment.html#augmentcb.__init__', 'miniai/augment.py'),
+                                'miniai.augment.AugmentCB._tfm': ('augment.html#augmentcb._tfm', 'miniai/augment.py'),
+                                'miniai.augment.AugmentCB.before_fit': ('augment.html#augmentcb.before_fit', 'miniai/augment.py'),
+                                'miniai.augment.BatchAug': ('augment.html#batchaug', 'miniai/augment.py'),
+                                'miniai.augment.BatchAug.__init__': ('augment.html#batchaug.__init__', 'miniai/augment.py'),
+                                'miniai.augment.BatchAug._affine': ('augment.html#batchaug._affine', 'miniai/augment.py'),
+                                'miniai.augment.BatchAug._generator': ('augment.html#batchaug._generator', 'miniai/augment.py'),
+                                'miniai.augment.BatchAug.forward': ('augment.html#batchaug.forward', 'miniai/augment.py'),
+                                'miniai.augment.BatchAug.reset': ('augment.html#batchaug.reset', 'miniai/augment.py'),
+                                'miniai.augment.BatchRandCopy': ('augment.html#batchrandcopy', 'miniai/augment.py'),
+                                'miniai.augment.BatchRandCopy.__init__': ('augment.html#batchrandcopy.__init__', 'miniai/augment.py'),
+                                'miniai.augment.BatchRandCopy.forward': ('augment.html#batchrandcopy.forward', 'miniai/augment.py'),
+                                'miniai.augment.BatchRandErase': ('augment.html#batchranderase', 'miniai/augment.py'),
+                                'miniai.augment.BatchRandErase.__init__': ('augment.html#batchranderase.__init__', 'miniai/augment.py'),
+                                'miniai.augment.BatchRandErase.forward': ('augment.html#batchranderase.forward', 'miniai/augment.py'),
+                                'miniai.augment.CapturePreds': ('augment.html#capturepreds', 'miniai/augment.py'),
+                                'miniai.augment.CapturePreds.__init__': ('augment.html#capturepreds.__init__', 'miniai/augment.py'),
                                 'miniai.augment.CapturePreds.after_batch': ('augment.html#capturepreds.after_batch', 'miniai/augment.py'),
                                 'miniai.augment.CapturePreds.after_fit': ('augment.html#capturepreds.after_fit', 'miniai/augment.py'),
                                 'miniai.augment.CapturePreds.before_fit': ('augment.html#capturepreds.before_fit', 'miniai/augment.py'),
@@ -62,34 +118,97 @@ d = { 'settings': { 'branch': 'master',
                                 'miniai.augment.RandErase': ('augment.html#randerase', 'miniai/augment.py'),
                                 'miniai.augment.RandErase.__init__': ('augment.html#randerase.__init__', 'miniai/augment.py'),
                                 'miniai.augment.RandErase.forward': ('augment.html#randerase.forward', 'miniai/augment.py'),
+                                'miniai.augment._Capture': ('augment.html#_capture', 'miniai/augment.py'),
+                                'miniai.augment._Capture.__init__': ('augment.html#_capture.__init__', 'miniai/augment.py'),
+                                'miniai.augment._Capture._alloc': ('augment.html#_capture._alloc', 'miniai/augment.py'),
+                                'miniai.augment._Capture.add': ('augment.html#_capture.add', 'miniai/augment.py'),
+                                'miniai.augment._Capture.result': ('augment.html#_capture.result', 'miniai/augment.py'),
                                 'miniai.augment._flops': ('augment.html#_flops', 'miniai/augment.py'),
+                                'miniai.augment._n_items': ('augment.html#_n_items', 'miniai/augment.py'),
                                 'miniai.augment._rand_copy1': ('augment.html#_rand_copy1', 'miniai/augment.py'),
                                 'miniai.augment._rand_erase1': ('augment.html#_rand_erase1', 'miniai/augment.py'),
+                                'miniai.augment._rand_rects': ('augment.html#_rand_rects', 'miniai/augment.py'),
+                                'miniai.augment._rect_idx': ('augment.html#_rect_idx', 'miniai/augment.py'),
+                                'miniai.augment.batch_rand_copy': ('augment.html#batch_rand_copy', 'miniai/augment.py'),
+                                'miniai.augment.batch_rand_erase': ('augment.html#batch_rand_erase', 'miniai/augment.py'),
                                 'miniai.augment.capture_preds': ('augment.html#capture_preds', 'miniai/augment.py'),
                                 'miniai.augment.rand_copy': ('augment.html#rand_copy', 'miniai/augment.py'),
                                 'miniai.augment.rand_erase': ('augment.html#rand_erase', 'miniai/augment.py'),
                                 'miniai.augment.show_image_batch': ('augment.html#show_image_batch', 'miniai/augment.py'),
                                 'miniai.augment.summary': ('augment.html#summary', 'miniai/augment.py')},
-            'miniai.conv': { 'miniai.conv.collate_device': ('convolutions.html#collate_device', 'miniai/conv.py'),
+            'miniai.conv': { 'miniai.conv.BatchMover': ('convolutions.html#batchmover', 'miniai/conv.py'),
+                             'miniai.conv.BatchMover.__call__': ('convolutions.html#batchmover.__call__', 'miniai/conv.py'),
+                             'miniai.conv.BatchMover.__init__': ('convolutions.html#batchmover.__init__', 'miniai/conv.py'),
+                             'miniai.conv.BatchMover._move': ('convolutions.html#batchmover._move', 'miniai/conv.py'),
+                             'miniai.conv._Mismatch': ('convolutions.html#_mismatch', 'miniai/conv.py'),
+                             'miniai.conv._compile': ('convolutions.html#_compile', 'miniai/conv.py'),
+                             'miniai.conv.collate_device': ('convolutions.html#collate_device', 'miniai/conv.py'),
                              'miniai.conv.conv': ('convolutions.html#conv', 'miniai/conv.py'),
                              'miniai.conv.to_device': ('convolutions.html#to_device', 'miniai/conv.py')},
             'miniai.core': {'miniai.core.foo': ('core.html#foo', 'miniai/core.py')},
-            'miniai.datasets': { 'miniai.datasets.collate_dict': ('datasets_and_plotting.html#collate_dict', 'miniai/datasets.py'),
+            'miniai.datasets': { 'miniai.datasets.DsCache': ('datasets_and_plotting.html#dscache', 'miniai/datasets.py'),
+                                 'miniai.datasets.DsCache.__call__': ('datasets_and_plotting.html#dscache.__call__', 'miniai/datasets.py'),
+                                 'miniai.datasets.DsCache.__init__': ('datasets_and_plotting.html#dscache.__init__', 'miniai/datasets.py'),
+                                 'miniai.datasets.DsCache._write': ('datasets_and_plotting.html#dscache._write', 'miniai/datasets.py'),
+                                 'miniai.datasets.DsCache.entries': ('datasets_and_plotting.html#dscache.entries', 'miniai/datasets.py'),
+                                 'miniai.datasets.DsCache.evict': ('datasets_and_plotting.html#dscache.evict', 'miniai/datasets.py'),
+                                 'miniai.datasets.DsCache.key': ('datasets_and_plotting.html#dscache.key', 'miniai/datasets.py'),
+                                 'miniai.datasets.MmapDataset': ('datasets_and_plotting.html#mmapdataset', 'miniai/datasets.py'),
+                                 'miniai.datasets.MmapDataset.__getitem__': ( 'datasets_and_plotting.html#mmapdataset.__getitem__',
+                                                                              'miniai/datasets.py'),
+                                 'miniai.datasets.MmapDataset.__getstate__': ( 'datasets_and_plotting.html#mmapdataset.__getstate__',
+                                                                               'miniai/datasets.py'),
+                                 'miniai.datasets.MmapDataset.__init__': ( 'datasets_and_plotting.html#mmapdataset.__init__',
+                                                                           'miniai/datasets.py'),
+                                 'miniai.datasets.MmapDataset.__len__': ( 'datasets_and_plotting.html#mmapdataset.__len__',
+                                                                          'miniai/datasets.py'),
+                                 'miniai.datasets.MmapDataset.features': ( 'datasets_and_plotting.html#mmapdataset.features',
+                                                                           'miniai/datasets.py'),
+                                 'miniai.datasets.MmapDataset.tensors': ( 'datasets_and_plotting.html#mmapdataset.tensors',
+                                                                          'miniai/datasets.py'),
+                                 'miniai.datasets._arg_src': ('datasets_and_plotting.html#_arg_src', 'miniai/datasets.py'),
+                                 'miniai.datasets._code_src': ('datasets_and_plotting.html#_code_src', 'miniai/datasets.py'),
+                                 'miniai.datasets._tfm_src': ('datasets_and_plotting.html#_tfm_src', 'miniai/datasets.py'),
+                                 'miniai.datasets.cache_dd': ('datasets_and_plotting.html#cache_dd', 'miniai/datasets.py'),
+                                 'miniai.datasets.collate_dict': ('datasets_and_plotting.html#collate_dict', 'miniai/datasets.py'),
                                  'miniai.datasets.get_grid': ('datasets_and_plotting.html#get_grid', 'miniai/datasets.py'),
                                  'miniai.datasets.inplace': ('datasets_and_plotting.html#inplace', 'miniai/datasets.py'),
                                  'miniai.datasets.show_image': ('datasets_and_plotting.html#show_image', 'miniai/datasets.py'),
                                  'miniai.datasets.show_images': ('datasets_and_plotting.html#show_images', 'miniai/datasets.py'),
-                                 'miniai.datasets.subplots': ('datasets_and_plotting.html#subplots', 'miniai/datasets.py')},
+                                 'miniai.datasets.subplots': ('datasets_and_plotting.html#subplots', 'miniai/datasets.py'),
+                                 'miniai.datasets.tensor_chunks': ('datasets_and_plotting.html#tensor_chunks', 'miniai/datasets.py')},
             'miniai.fid': { 'miniai.fid.ImageEval': ('fid.html#imageeval', 'miniai/fid.py'),
                             'miniai.fid.ImageEval.__init__': ('fid.html#imageeval.__init__', 'miniai/fid.py'),
+                            'miniai.fid.ImageEval._run_stream': ('fid.html#imageeval._run_stream', 'miniai/fid.py'),
+                            'miniai.fid.ImageEval._samp_dls': ('fid.html#imageeval._samp_dls', 'miniai/fid.py'),
                             'miniai.fid.ImageEval.fid': ('fid.html#imageeval.fid', 'miniai/fid.py'),
                             'miniai.fid.ImageEval.get_feats': ('fid.html#imageeval.get_feats', 'miniai/fid.py'),
                             'miniai.fid.ImageEval.kid': ('fid.html#imageeval.kid', 'miniai/fid.py'),
+                            'miniai.fid.ImageEval.load': ('fid.html#imageeval.load', 'miniai/fid.py'),
+                            'miniai.fid.ImageEval.save': ('fid.html#imageeval.save', 'miniai/fid.py'),
+                            'miniai.fid.Reservoir': ('fid.html#reservoir', 'miniai/fid.py'),
+                            'miniai.fid.Reservoir.__init__': ('fid.html#reservoir.__init__', 'miniai/fid.py'),
+                            'miniai.fid.Reservoir.sample': ('fid.html#reservoir.sample', 'miniai/fid.py'),
+                            'miniai.fid.Reservoir.update': ('fid.html#reservoir.update', 'miniai/fid.py'),
+                            'miniai.fid.RunningStats': ('fid.html#runningstats', 'miniai/fid.py'),
+                            'miniai.fid.RunningStats.__init__': ('fid.html#runningstats.__init__', 'miniai/fid.py'),
+                            'miniai.fid.RunningStats.cov': ('fid.html#runningstats.cov', 'miniai/fid.py'),
+                            'miniai.fid.RunningStats.stats': ('fid.html#runningstats.stats', 'miniai/fid.py'),
+                            'miniai.fid.RunningStats.update': ('fid.html#runningstats.update', 'miniai/fid.py'),
+                            'miniai.fid.StreamStatsCB': ('fid.html#streamstatscb', 'miniai/fid.py'),
+                            'miniai.fid.StreamStatsCB.__init__': ('fid.html#streamstatscb.__init__', 'miniai/fid.py'),
+                            'miniai.fid.StreamStatsCB.after_batch': ('fid.html#streamstatscb.after_batch', 'miniai/fid.py'),
+                            'miniai.fid.StreamStatsCB.before_fit': ('fid.html#streamstatscb.before_fit', 'miniai/fid.py'),
                             'miniai.fid._calc_fid': ('fid.html#_calc_fid', 'miniai/fid.py'),
                             'miniai.fid._calc_kid': ('fid.html#_calc_kid', 'miniai/fid.py'),
                             'miniai.fid._calc_stats': ('fid.html#_calc_stats', 'miniai/fid.py'),
+                            'miniai.fid._kern_sum': ('fid.html#_kern_sum', 'miniai/fid.py'),
                             'miniai.fid._sqrtm_newton_schulz': ('fid.html#_sqrtm_newton_schulz', 'miniai/fid.py'),
-                            'miniai.fid._squared_mmd': ('fid.html#_squared_mmd', 'miniai/fid.py')},
+                            'miniai.fid._squared_mmd': ('fid.html#_squared_mmd', 'miniai/fid.py'),
+                            'miniai.fid._subsets': ('fid.html#_subsets', 'miniai/fid.py'),
+                            'miniai.fid._tr_sqrt_eig': ('fid.html#_tr_sqrt_eig', 'miniai/fid.py'),
+                            'miniai.fid._tr_sqrt_newton_schulz': ('fid.html#_tr_sqrt_newton_schulz', 'miniai/fid.py'),
+                            'miniai.fid._tr_sqrt_scipy': ('fid.html#_tr_sqrt_scipy', 'miniai/fid.py')},
             'miniai.init': { 'miniai.init.BatchTransformCB': ('initializing.html#batchtransformcb', 'miniai/init.py'),
                              'miniai.init.BatchTransformCB.__init__': ('initializing.html#batchtransformcb.__init__', 'miniai/init.py'),
                              'miniai.init.BatchTransformCB.before_batch': ( 'initializing.html#batchtransformcb.before_batch',
@@ -97,6 +216,10 @@ d = { 'settings': { 'branch': 'master',
                              'miniai.init.GeneralRelu': ('initializing.html#generalrelu', 'miniai/init.py'),
                              'miniai.init.GeneralRelu.__init__': ('initializing.html#generalrelu.__init__', 'miniai/init.py'),
                              'miniai.init.GeneralRelu.forward': ('initializing.html#generalrelu.forward', 'miniai/init.py'),
+                             'miniai.init._GeneralReluFn': ('initializing.html#_generalrelufn', 'miniai/init.py'),
+                             'miniai.init._GeneralReluFn.backward': ('initializing.html#_generalrelufn.backward', 'miniai/init.py'),
+                             'miniai.init._GeneralReluFn.forward': ('initializing.html#_generalrelufn.forward', 'miniai/init.py'),
+                             'miniai.init._general_relu_': ('initializing.html#_general_relu_', 'miniai/init.py'),
                              'miniai.init._lsuv_stats': ('initializing.html#_lsuv_stats', 'miniai/init.py'),
                              'miniai.init.clean_ipython_hist': ('initializing.html#clean_ipython_hist', 'miniai/init.py'),
                              'miniai.init.clean_mem': ('initializing.html#clean_mem', 'miniai/init.py'),
@@ -113,12 +236,22 @@ d = { 'settings': { 'branch': 'master',
                                 'miniai.learner.DataLoaders': ('learner.html#dataloaders', 'miniai/learner.py'),
                                 'miniai.learner.DataLoaders.__init__': ('learner.html#dataloaders.__init__', 'miniai/learner.py'),
                                 'miniai.learner.DataLoaders.from_dd': ('learner.html#dataloaders.from_dd', 'miniai/learner.py'),
+                                'miniai.learner.DataLoaders.from_tensors': ('learner.html#dataloaders.from_tensors', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB': ('learner.html#devicecb', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB.__init__': ('learner.html#devicecb.__init__', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB.before_batch': ('learner.html#devicecb.before_batch', 'miniai/learner.py'),
+                                'miniai.learner.DeviceCB.before_epoch': ('learner.html#devicecb.before_epoch', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB.before_fit': ('learner.html#devicecb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.DeviceCB.cleanup_epoch': ('learner.html#devicecb.cleanup_epoch', 'miniai/learner.py'),
+                                'miniai.learner.GradAccumCB': ('learner.html#gradaccumcb', 'miniai/learner.py'),
+                                'miniai.learner.GradAccumCB.__init__': ('learner.html#gradaccumcb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.GradAccumCB.before_batch': ('learner.html#gradaccumcb.before_batch', 'miniai/learner.py'),
+                                'miniai.learner.GradAccumCB.before_epoch': ('learner.html#gradaccumcb.before_epoch', 'miniai/learner.py'),
+                                'miniai.learner.GradAccumCB.before_fit': ('learner.html#gradaccumcb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.GradAccumCB.cleanup_fit': ('learner.html#gradaccumcb.cleanup_fit', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB': ('learner.html#lrfindercb', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.__init__': ('learner.html#lrfindercb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.LRFinderCB._check': ('learner.html#lrfindercb._check', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.after_batch': ('learner.html#lrfindercb.after_batch', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.before_fit': ('learner.html#lrfindercb.before_fit', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.cleanup_fit': ('learner.html#lrfindercb.cleanup_fit', 'miniai/learner.py'),
@@ -126,8 +259,10 @@ d = { 'settings': { 'branch': 'master',
                                 'miniai.learner.Learner.__getattr__': ('learner.html#learner.__getattr__', 'miniai/learner.py'),
                                 'miniai.learner.Learner.__init__': ('learner.html#learner.__init__', 'miniai/learner.py'),
                                 'miniai.learner.Learner._fit': ('learner.html#learner._fit', 'miniai/learner.py'),
+                                'miniai.learner.Learner._micro_batches': ('learner.html#learner._micro_batches', 'miniai/learner.py'),
                                 'miniai.learner.Learner._one_batch': ('learner.html#learner._one_batch', 'miniai/learner.py'),
                                 'miniai.learner.Learner._one_epoch': ('learner.html#learner._one_epoch', 'miniai/learner.py'),
+                                'miniai.learner.Learner._update_cbt': ('learner.html#learner._update_cbt', 'miniai/learner.py'),
                                 'miniai.learner.Learner.callback': ('learner.html#learner.callback', 'miniai/learner.py'),
                                 'miniai.learner.Learner.cb_ctx': ('learner.html#learner.cb_ctx', 'miniai/learner.py'),
                                 'miniai.learner.Learner.fit': ('learner.html#learner.fit', 'miniai/learner.py'),
@@ -135,7 +270,9 @@ d = { 'settings': { 'branch': 'master',
                                 'miniai.learner.Learner.training': ('learner.html#learner.training', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB': ('learner.html#metricscb', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.__init__': ('learner.html#metricscb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.MetricsCB._compute': ('learner.html#metricscb._compute', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB._log': ('learner.html#metricscb._log', 'miniai/learner.py'),
+                                'miniai.learner.MetricsCB._to': ('learner.html#metricscb._to', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.after_batch': ('learner.html#metricscb.after_batch', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.after_epoch': ('learner.html#metricscb.after_epoch', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.before_epoch': ('learner.html#metricscb.before_epoch', 'miniai/learner.py'),
@@ -143,14 +280,57 @@ d = { 'settings': { 'branch': 'master',
                                 'miniai.learner.MomentumLearner': ('learner.html#momentumlearner', 'miniai/learner.py'),
                                 'miniai.learner.MomentumLearner.__init__': ('learner.html#momentumlearner.__init__', 'miniai/learner.py'),
                                 'miniai.learner.MomentumLearner.zero_grad': ('learner.html#momentumlearner.zero_grad', 'miniai/learner.py'),
+                                'miniai.learner.Prefetcher': ('learner.html#prefetcher', 'miniai/learner.py'),
+                                'miniai.learner.Prefetcher.__init__': ('learner.html#prefetcher.__init__', 'miniai/learner.py'),
+                                'miniai.learner.Prefetcher.__iter__': ('learner.html#prefetcher.__iter__', 'miniai/learner.py'),
+                                'miniai.learner.Prefetcher.__len__': ('learner.html#prefetcher.__len__', 'miniai/learner.py'),
+                                'miniai.learner.Prefetcher._load': ('learner.html#prefetcher._load', 'miniai/learner.py'),
+                                'miniai.learner.Prefetcher.close': ('learner.html#prefetcher.close', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB': ('learner.html#profilercb', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB.__init__': ('learner.html#profilercb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB._add': ('learner.html#profilercb._add', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB._callback': ('learner.html#profilercb._callback', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB._now': ('learner.html#profilercb._now', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB._start_torch': ('learner.html#profilercb._start_torch', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB._stop_torch': ('learner.html#profilercb._stop_torch', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB.before_fit': ('learner.html#profilercb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB.cleanup_fit': ('learner.html#profilercb.cleanup_fit', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB.export_trace': ('learner.html#profilercb.export_trace', 'miniai/learner.py'),
+                                'miniai.learner.ProfilerCB.summary': ('learner.html#profilercb.summary', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB': ('learner.html#progresscb', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.__init__': ('learner.html#progresscb.__init__', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB._log': ('learner.html#progresscb._log', 'miniai/learner.py'),
+                                'miniai.learner.ProgressCB._log_speed': ('learner.html#progresscb._log_speed', 'miniai/learner.py'),
+                                'miniai.learner.ProgressCB._loss': ('learner.html#progresscb._loss', 'miniai/learner.py'),
+                                'miniai.learner.ProgressCB._redraw': ('learner.html#progresscb._redraw', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.after_batch': ('learner.html#progresscb.after_batch', 'miniai/learner.py'),
+                                'miniai.learner.ProgressCB.after_epoch': ('learner.html#progresscb.after_epoch', 'miniai/learner.py'),
+                                'miniai.learner.ProgressCB.before_batch': ('learner.html#progresscb.before_batch', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.before_epoch': ('learner.html#progresscb.before_epoch', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.before_fit': ('learner.html#progresscb.before_fit', 'miniai/learner.py'),
                                 'miniai.learner.SingleBatchCB': ('learner.html#singlebatchcb', 'miniai/learner.py'),
                                 'miniai.learner.SingleBatchCB.after_batch': ('learner.html#singlebatchcb.after_batch', 'miniai/learner.py'),
+                                'miniai.learner.TensorDataLoader': ('learner.html#tensordataloader', 'miniai/learner.py'),
+                                'miniai.learner.TensorDataLoader.__init__': ('learner.html#tensordataloader.__init__', 'miniai/learner.py'),
+                                'miniai.learner.TensorDataLoader.__iter__': ('learner.html#tensordataloader.__iter__', 'miniai/learner.py'),
+                                'miniai.learner.TensorDataLoader.__len__': ('learner.html#tensordataloader.__len__', 'miniai/learner.py'),
+                                'miniai.learner.TensorDataLoader._gather': ('learner.html#tensordataloader._gather', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries': ('learner.html#timeseries', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.__array__': ('learner.html#timeseries.__array__', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.__init__': ('learner.html#timeseries.__init__', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.__len__': ('learner.html#timeseries.__len__', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries._add': ('learner.html#timeseries._add', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries._col': ('learner.html#timeseries._col', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries._reset': ('learner.html#timeseries._reset', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.append': ('learner.html#timeseries.append', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.flush': ('learner.html#timeseries.flush', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.from_state': ('learner.html#timeseries.from_state', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.max': ('learner.html#timeseries.max', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.mean': ('learner.html#timeseries.mean', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.min': ('learner.html#timeseries.min', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.n_steps': ('learner.html#timeseries.n_steps', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.state': ('learner.html#timeseries.state', 'miniai/learner.py'),
+                                'miniai.learner.TimeSeries.steps': ('learner.html#timeseries.steps', 'miniai/learner.py'),
                                 'miniai.learner.TrainCB': ('learner.html#traincb', 'miniai/learner.py'),
                                 'miniai.learner.TrainCB.__init__': ('learner.html#traincb.__init__', 'miniai/learner.py'),
                                 'miniai.learner.TrainCB.backward': ('learner.html#traincb.backward', 'miniai/learner.py'),
@@ -164,8 +344,23 @@ d = { 'settings': { 'branch': 'master',
                                 'miniai.learner.TrainLearner.predict': ('learner.html#trainlearner.predict', 'miniai/learner.py'),
                                 'miniai.learner.TrainLearner.step': ('learner.html#trainlearner.step', 'miniai/learner.py'),
                                 'miniai.learner.TrainLearner.zero_grad': ('learner.html#trainlearner.zero_grad', 'miniai/learner.py'),
+                                'miniai.learner._CbTable': ('learner.html#_cbtable', 'miniai/learner.py'),
+                                'miniai.learner._CbTable.__init__': ('learner.html#_cbtable.__init__', 'miniai/learner.py'),
+                                'miniai.learner._CbTable.__missing__': ('learner.html#_cbtable.__missing__', 'miniai/learner.py'),
+                                'miniai.learner._CbTable.matches': ('learner.html#_cbtable.matches', 'miniai/learner.py'),
+                                'miniai.learner._Grouped': ('learner.html#_grouped', 'miniai/learner.py'),
+                                'miniai.learner._Grouped.__init__': ('learner.html#_grouped.__init__', 'miniai/learner.py'),
+                                'miniai.learner._Grouped.__iter__': ('learner.html#_grouped.__iter__', 'miniai/learner.py'),
+                                'miniai.learner._Grouped.__len__': ('learner.html#_grouped.__len__', 'miniai/learner.py'),
+                                'miniai.learner._batch_len': ('learner.html#_batch_len', 'miniai/learner.py'),
+                                'miniai.learner._cat_batches': ('learner.html#_cat_batches', 'miniai/learner.py'),
+                                'miniai.learner._ds_tensors': ('learner.html#_ds_tensors', 'miniai/learner.py'),
+                                'miniai.learner._record_stream': ('learner.html#_record_stream', 'miniai/learner.py'),
+                                'miniai.learner._split_batch': ('learner.html#_split_batch', 'miniai/learner.py'),
+                                'miniai.learner.load_series': ('learner.html#load_series', 'miniai/learner.py'),
                                 'miniai.learner.lr_find': ('learner.html#lr_find', 'miniai/learner.py'),
                                 'miniai.learner.run_cbs': ('learner.html#run_cbs', 'miniai/learner.py'),
+                                'miniai.learner.save_series': ('learner.html#save_series', 'miniai/learner.py'),
                                 'miniai.learner.to_cpu': ('learner.html#to_cpu', 'miniai/learner.py'),
                                 'miniai.learner.with_cbs': ('learner.html#with_cbs', 'miniai/learner.py'),
                                 'miniai.learner.with_cbs.__call__': ('learner.html#with_cbs.__call__', 'miniai/learner.py'),
@@ -173,23 +368,80 @@ d = { 'settings': { 'branch': 'master',
             'miniai.resnet': { 'miniai.resnet.ResBlock': ('resnet.html#resblock', 'miniai/resnet.py'),
                                'miniai.resnet.ResBlock.__init__': ('resnet.html#resblock.__init__', 'miniai/resnet.py'),
                                'miniai.resnet.ResBlock.forward': ('resnet.html#resblock.forward', 'miniai/resnet.py'),
-                               'miniai.resnet._conv_block': ('resnet.html#_conv_block', 'miniai/resnet.py')},
+                               'miniai.resnet._conv_block': ('resnet.html#_conv_block', 'miniai/resnet.py'),
+                               'miniai.resnet.fuse_model': ('resnet.html#fuse_model', 'miniai/resnet.py'),
+                               'miniai.resnet.memory_format_report': ('resnet.html#memory_format_report', 'miniai/resnet.py')},
             'miniai.sgd': { 'miniai.sgd.BaseSchedCB': ('accel_sgd.html#baseschedcb', 'miniai/sgd.py'),
                             'miniai.sgd.BaseSchedCB.__init__': ('accel_sgd.html#baseschedcb.__init__', 'miniai/sgd.py'),
                             'miniai.sgd.BaseSchedCB._step': ('accel_sgd.html#baseschedcb._step', 'miniai/sgd.py'),
                             'miniai.sgd.BaseSchedCB.before_fit': ('accel_sgd.html#baseschedcb.before_fit', 'miniai/sgd.py'),
                             'miniai.sgd.BatchSchedCB': ('accel_sgd.html#batchschedcb', 'miniai/sgd.py'),
+                            'miniai.sgd.BatchSchedCB.__init__': ('accel_sgd.html#batchschedcb.__init__', 'miniai/sgd.py'),
                             'miniai.sgd.BatchSchedCB.after_batch': ('accel_sgd.html#batchschedcb.after_batch', 'miniai/sgd.py'),
+                            'miniai.sgd.BatchSchedCB.before_fit': ('accel_sgd.html#batchschedcb.before_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB': ('accel_sgd.html#checkpointcb', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.__init__': ('accel_sgd.html#checkpointcb.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB._join': ('accel_sgd.html#checkpointcb._join', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB._write': ('accel_sgd.html#checkpointcb._write', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.after_batch': ('accel_sgd.html#checkpointcb.after_batch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.after_epoch': ('accel_sgd.html#checkpointcb.after_epoch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.before_epoch': ('accel_sgd.html#checkpointcb.before_epoch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.before_fit': ('accel_sgd.html#checkpointcb.before_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.cleanup_batch': ('accel_sgd.html#checkpointcb.cleanup_batch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.cleanup_epoch': ('accel_sgd.html#checkpointcb.cleanup_epoch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.cleanup_fit': ('accel_sgd.html#checkpointcb.cleanup_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.latest': ('accel_sgd.html#checkpointcb.latest', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.save': ('accel_sgd.html#checkpointcb.save', 'miniai/sgd.py'),
                             'miniai.sgd.EpochSchedCB': ('accel_sgd.html#epochschedcb', 'miniai/sgd.py'),
                             'miniai.sgd.EpochSchedCB.after_epoch': ('accel_sgd.html#epochschedcb.after_epoch', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatAdam': ('accel_sgd.html#flatadam', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatAdam.__init__': ('accel_sgd.html#flatadam.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatAdam.opt_step': ('accel_sgd.html#flatadam.opt_step', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer': ('accel_sgd.html#flatoptimizer', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.__init__': ('accel_sgd.html#flatoptimizer.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer._flatten': ('accel_sgd.html#flatoptimizer._flatten', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer._state': ('accel_sgd.html#flatoptimizer._state', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer._valid': ('accel_sgd.html#flatoptimizer._valid', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.load_state_dict': ('accel_sgd.html#flatoptimizer.load_state_dict', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.step': ('accel_sgd.html#flatoptimizer.step', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.zero_grad': ('accel_sgd.html#flatoptimizer.zero_grad', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatSGD': ('accel_sgd.html#flatsgd', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatSGD.__init__': ('accel_sgd.html#flatsgd.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatSGD.opt_step': ('accel_sgd.html#flatsgd.opt_step', 'miniai/sgd.py'),
                             'miniai.sgd.HasLearnCB': ('accel_sgd.html#haslearncb', 'miniai/sgd.py'),
                             'miniai.sgd.HasLearnCB.after_fit': ('accel_sgd.html#haslearncb.after_fit', 'miniai/sgd.py'),
                             'miniai.sgd.HasLearnCB.before_fit': ('accel_sgd.html#haslearncb.before_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched': ('accel_sgd.html#precomputedsched', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.__init__': ('accel_sgd.html#precomputedsched.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched._set': ('accel_sgd.html#precomputedsched._set', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.get_last_lr': ('accel_sgd.html#precomputedsched.get_last_lr', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.load_state_dict': ( 'accel_sgd.html#precomputedsched.load_state_dict',
+                                                                             'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.plot': ('accel_sgd.html#precomputedsched.plot', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.state_dict': ('accel_sgd.html#precomputedsched.state_dict', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.step': ('accel_sgd.html#precomputedsched.step', 'miniai/sgd.py'),
                             'miniai.sgd.RecorderCB': ('accel_sgd.html#recordercb', 'miniai/sgd.py'),
                             'miniai.sgd.RecorderCB.__init__': ('accel_sgd.html#recordercb.__init__', 'miniai/sgd.py'),
                             'miniai.sgd.RecorderCB.after_batch': ('accel_sgd.html#recordercb.after_batch', 'miniai/sgd.py'),
                             'miniai.sgd.RecorderCB.before_fit': ('accel_sgd.html#recordercb.before_fit', 'miniai/sgd.py'),
-                            'miniai.sgd.RecorderCB.plot': ('accel_sgd.html#recordercb.plot', 'miniai/sgd.py')},
+                            'miniai.sgd.RecorderCB.plot': ('accel_sgd.html#recordercb.plot', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB.save': ('accel_sgd.html#recordercb.save', 'miniai/sgd.py'),
+                            'miniai.sgd._SkipDL': ('accel_sgd.html#_skipdl', 'miniai/sgd.py'),
+                            'miniai.sgd._SkipDL.__init__': ('accel_sgd.html#_skipdl.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd._SkipDL.__iter__': ('accel_sgd.html#_skipdl.__iter__', 'miniai/sgd.py'),
+                            'miniai.sgd._SkipDL.__len__': ('accel_sgd.html#_skipdl.__len__', 'miniai/sgd.py'),
+                            'miniai.sgd._cpu_copy': ('accel_sgd.html#_cpu_copy', 'miniai/sgd.py'),
+                            'miniai.sgd._flat_views': ('accel_sgd.html#_flat_views', 'miniai/sgd.py'),
+                            'miniai.sgd._rng_states': ('accel_sgd.html#_rng_states', 'miniai/sgd.py'),
+                            'miniai.sgd._set_rng_states': ('accel_sgd.html#_set_rng_states', 'miniai/sgd.py'),
+                            'miniai.sgd.combine_scheds': ('accel_sgd.html#combine_scheds', 'miniai/sgd.py'),
+                            'miniai.sgd.one_cycle': ('accel_sgd.html#one_cycle', 'miniai/sgd.py'),
+                            'miniai.sgd.one_cycle_mom': ('accel_sgd.html#one_cycle_mom', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_const': ('accel_sgd.html#sched_const', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_cos': ('accel_sgd.html#sched_cos', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_exp': ('accel_sgd.html#sched_exp', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_lin': ('accel_sgd.html#sched_lin', 'miniai/sgd.py'),
+                            'miniai.sgd.warmup_decay': ('accel_sgd.html#warmup_decay', 'miniai/sgd.py')},
             'miniai.training': { 'miniai.training.Dataset': ('dataloaders_optimisers_training.html#dataset', 'miniai/training.py'),
                                  'miniai.training.Dataset.__getitem__': ( 'dataloaders_optimisers_training.html#dataset.__getitem__',
                                                                           'miniai/training.py'),
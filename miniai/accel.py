@@ -1,7 +1,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/17_DDPM_v2.ipynb.
 
 # %% auto 0
-__all__ = ['MixedPrecision', 'AccelerateCB']
+__all__ = ['MixedPrecision', 'AccelerateCB', 'CompileCB', 'DDPCB', 'ddp_fit']
 
 # %% ../nbs/17_DDPM_v2.ipynb 3
 import pickle,gzip,math,os,time,shutil,torch,random,logging
@@ -28,15 +28,43 @@ from .augment import *
 
 # %% ../nbs/17_DDPM_v2.ipynb 51
 class MixedPrecision(TrainCB):
+    """ Autocast the forward pass and loss to `dtype` on the device the `DeviceCB` in the learner uses (or
+    `def_device`).  By default that's float16 with a gradient scaler on cuda, and bfloat16 without one on the cpu
+    (bfloat16 has the same range as float32 so the gradients don't need scaling).  `scale` overrides whether the
+    scaler is used.
+    
+    The autocast is exited after the loss, or in `cleanup_batch` if the batch was cancelled before then.  With
+    micro-batches (see `GradAccumCB`) it's entered again for each one, so the backward passes are never autocast
+    """
     order = DeviceCB.order+10
+
+    def __init__(self, n_inp=1, dtype=None, scale=None):
+        super().__init__(n_inp=n_inp)
+        self.dtype,self.scale = dtype,scale
     
-    def before_fit(self, learn): self.scaler = torch.cuda.amp.GradScaler()
+    def before_fit(self, learn):
+        dev = next((cb.device for cb in learn.cbs if isinstance(cb, DeviceCB)), def_device)
+        self.dev_type = torch.device(dev).type
+        self.dt = self.dtype or (torch.float16 if self.dev_type=='cuda' else torch.bfloat16)
+        scale = self.dt==torch.float16 if self.scale is None else self.scale
+        self.scaler = torch.amp.GradScaler(self.dev_type, enabled=scale)
+        self.autocast = None
 
-    def before_batch(self, learn):
-        self.autocast = torch.autocast("cuda", dtype=torch.float16)
+    def before_batch(self, learn): self._enter()
+    def before_micro_batch(self, learn): self._enter()
+
+    def _enter(self):
+        if self.autocast is not None: return
+        self.autocast = torch.autocast(self.dev_type, dtype=self.dt)
         self.autocast.__enter__()
 
-    def after_loss(self, learn): self.autocast.__exit__(None, None, None)
+    def _exit(self):
+        if self.autocast is None: return
+        self.autocast.__exit__(None, None, None)
+        self.autocast = None
+
+    def after_loss(self, learn): self._exit()
+    def cleanup_batch(self, learn): self._exit()
         
     def backward(self, learn): self.scaler.scale(learn.loss).backward()
 
@@ -62,3 +90,216 @@ class AccelerateCB(TrainCB):
             learn.model, learn.opt, learn.dls.train, learn.dls.valid)
 
     def backward(self, learn): self.acc.backward(learn.loss)
+
+# %% ../nbs/17_DDPM_v2.ipynb 81
+import hashlib,warnings
+
+def _n_graphs(): return torch._dynamo.utils.counters['stats']['unique_graphs']
+
+class _Compiled(nn.Module):
+    """ Stands in for the model while `CompileCB` is fitting.  The uncompiled model is kept as `model`, and is what
+    is called for any batch whose shape differs from the first one seen in that mode (train or eval)
+    """
+    def __init__(self, model, make, methods, verbose=True):
+        super().__init__()
+        self.model,self.make,self.methods,self.verbose = model,make,methods,verbose
+        self.fwd,self.shapes = {},{}
+        self.stats = {m:dict(method=None, secs=0., graphs=0, recompiles=0, eager=0) for m in (True,False)}
+
+    def _first(self, x):
+        "Compile with each of `methods` in turn until one works, timing it and its first call"
+        st = self.stats[self.training]
+        for m in self.methods:
+            graphs,start = _n_graphs(),time.perf_counter()
+            try:
+                fwd = self.make(self.model, x, m)
+                res = fwd(*x)
+            except Exception as e:
+                if self.verbose: print(f'CompileCB: {m} failed ({type(e).__name__}: {str(e)[:100]})')
+                continue
+            st.update(method=m, secs=time.perf_counter()-start, graphs=max(_n_graphs()-graphs, 1))
+            self.fwd[self.training] = fwd
+            return res
+        self.fwd[self.training] = None
+        return self.model(*x)
+
+    def forward(self, *x):
+        shape = tuple(o.shape for o in x)
+        if self.training not in self.fwd:
+            self.shapes[self.training] = shape
+            return self._first(x)
+        fwd,st = self.fwd[self.training],self.stats[self.training]
+        if fwd is None or shape!=self.shapes[self.training]:
+            st['eager'] += 1
+            return self.model(*x)
+        graphs,start = _n_graphs(),time.perf_counter()
+        res = fwd(*x)
+        if (n:=_n_graphs()-graphs):
+            st['recompiles'] += n
+            st['graphs'] += n
+            st['secs'] += time.perf_counter()-start
+        return res
+
+def _model_key(model, *extra):
+    "A hash of the structure of `model` (not its weights), and `extra`"
+    h = hashlib.sha1(repr(model).encode())
+    for k,v in model.state_dict().items(): h.update(f'{k}{tuple(v.shape)}{v.dtype}{v.device}'.encode())
+    for o in extra: h.update(str(o).encode())
+    return h.hexdigest()[:16]
+
+class CompileCB(Callback):
+    """ Compile `learn.model` at the start of `fit` with `torch.compile` (`method='compile'`, passing `mode` and
+    `backend` on to it), `torch.jit.script` or `torch.jit.trace`.  If that fails the methods in `fallbacks` are
+    tried in turn, and if they all fail the model is just run uncompiled.  (TorchScript's autodiff doesn't allow
+    in-place changes to tensors it saved for the backward pass, which rules it out for `GeneralRelu` with `sub`.)
+    
+    `learn.model` is only swapped for the compiled model during `fit` and the uncompiled model is put back
+    afterwards, so `Hooks`, `ActivationStatsCB` and `summary` always see the real modules.  Hooks on the modules at
+    the start of `fit` (eg from `ActivationStatsCB`, which runs first) are run by `torch.compile`, which breaks the
+    graph around any it can't trace.  TorchScript would leave them out, so then only `torch.compile` is tried, with a
+    warning (and if it isn't one of the methods, the model is run uncompiled).
+
+    The training and validation steps are compiled separately, each for the shape of its first batch.  Batches of
+    any other shape (like the last partial batch) are run uncompiled, so they don't trigger recompiles.  The
+    compile time, the number of graphs and recompiles, and the number of uncompiled batches are printed after fit
+    (and kept in `stats`).
+
+    With `cache_dir` the torch.compile artifacts are saved to a file named from a hash of the model's structure,
+    and loaded at the start of the next fit of the same model, even in a new process, which saves most of the
+    compile time
+    """
+    order = DeviceCB.order+5
+    def __init__(self, method='compile', mode=None, backend='inductor', fallbacks=('trace',), cache_dir=None,
+                 verbose=True):
+        fc.store_attr()
+        self.stats = None
+
+    def _make(self, model, x, method):
+        if method=='compile': return torch.compile(model, mode=self.mode, backend=self.backend, dynamic=False)
+        if method=='script': return torch.jit.script(model)
+        # a trace follows the path taken in the current mode, which is why train and eval get their own
+        if method=='trace': return torch.jit.trace(model, x, check_trace=False)
+        raise ValueError(f'unknown method {method}')
+
+    @property
+    def _cache_path(self):
+        key = _model_key(self.model, self.mode, self.backend, torch.__version__)
+        return Path(self.cache_dir)/f'compiled-{key}.bin'
+
+    def before_fit(self, learn):
+        self.model,self.wrapper = learn.model,None
+        methods = (self.method, *self.fallbacks)
+        if any(m._forward_hooks or m._forward_pre_hooks for m in self.model.modules()):
+            jit = [m for m in methods if m!='compile']
+            methods = tuple(m for m in methods if m=='compile')
+            if jit: warnings.warn(f"CompileCB: the model has hooks, which {' and '.join(jit)} would leave out, so it's "
+                                  + ('only compiled with torch.compile' if methods else 'run uncompiled'))
+        if self.cache_dir and self._cache_path.exists():
+            torch.compiler.load_cache_artifacts(self._cache_path.read_bytes())
+        self.wrapper = learn.model = _Compiled(self.model, self._make, methods, self.verbose).train(self.model.training)
+
+    def after_fit(self, learn):
+        if self.wrapper is None: return
+        self.stats = self.wrapper.stats
+        if self.cache_dir and any(o['method']=='compile' for o in self.stats.values()):
+            res = torch.compiler.save_cache_artifacts()
+            if res:
+                self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+                self._cache_path.write_bytes(res[0])
+        if self.verbose:
+            for m,o in self.stats.items():
+                if o['method'] is None: continue
+                print(f"CompileCB {'train' if m else 'eval'} ({o['method']}): {o['secs']:.1f}s compiling, "
+                      f"{o['graphs']} graphs, {o['recompiles']} recompiles, {o['eager']} uncompiled batches")
+
+    def cleanup_fit(self, learn): learn.model = self.model
+
+# %% ../nbs/17_DDPM_v2.ipynb 91
+import socket,tempfile,multiprocessing
+from copy import copy
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data.distributed import DistributedSampler
+from torcheval.metrics.toolkit import sync_and_compute
+
+def _shard(dl, shuffle, seed):
+    "A copy of `dl` that only loads this process's share of its dataset"
+    sampler = DistributedSampler(dl.dataset, shuffle=shuffle, seed=seed)
+    if isinstance(dl, TensorDataLoader):
+        dl = copy(dl)
+        dl.sampler = sampler
+        return dl
+    return DataLoader(dl.dataset, dl.batch_size, sampler=sampler, collate_fn=dl.collate_fn, num_workers=dl.num_workers,
+                      pin_memory=dl.pin_memory, drop_last=dl.drop_last)
+
+class DDPCB(Callback):
+    """ Data parallel training with `torch.distributed`, in each of the processes of a process group (which is
+    started from the usual environment variables, as set by eg `torchrun`, if it hasn't been already).  The model is
+    wrapped in `DistributedDataParallel` for the fit, and each process only loads its share of the training and
+    validation sets, through a `DistributedSampler` which is reshuffled each epoch (so the batch size is per
+    process).  The `MetricsCB` metrics are combined from all the processes, and only printed by rank 0.
+    
+    Callbacks that should only run on rank 0, like `ProgressCB`, need removing from the others before `fit`, which
+    `ddp_fit` does
+    """
+    order = DeviceCB.order+1
+    def __init__(self, backend='gloo', seed=42): fc.store_attr()
+
+    def before_fit(self, learn):
+        if not dist.is_initialized(): dist.init_process_group(self.backend)
+        self.rank = dist.get_rank()
+        self.model,self.dls = learn.model,learn.dls
+        learn.model = DistributedDataParallel(self.model)
+        learn.dls = DataLoaders(_shard(self.dls.train, True, self.seed), _shard(self.dls.valid, False, self.seed))
+        self.metrics = next((cb for cb in learn.cbs if isinstance(cb, MetricsCB)), None)
+        if self.metrics:
+            self.metrics._compute = sync_and_compute
+            if self.rank: self.metrics._log = fc.noop
+
+    def before_epoch(self, learn):
+        if learn.training: learn.dls.train.sampler.set_epoch(learn.epoch)
+
+    def cleanup_fit(self, learn):
+        learn.model,learn.dls = self.model,self.dls
+        if self.metrics:
+            del self.metrics._compute
+            if self.rank: del self.metrics._log
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _ddp_worker(rank, world_size, port, threads, learn, rank0_only, path, args, kwargs):
+    os.environ.update(MASTER_ADDR='127.0.0.1', MASTER_PORT=str(port))
+    torch.set_num_threads(threads)
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    try:
+        if rank: learn.cbs = fc.L(cb for cb in learn.cbs if not isinstance(cb, rank0_only))
+        learn.fit(*args, cbs=[DDPCB(), *fc.L(kwargs.pop('cbs', None))], **kwargs)
+        metrics = next((cb for cb in learn.cbs if isinstance(cb, MetricsCB)), None)
+        if rank==0: torch.save(dict(model=learn.model.state_dict(), values=metrics and metrics.values), path)
+    finally: dist.destroy_process_group()
+
+def ddp_fit(learn, *args, world_size=2, threads=None, rank0_only=(ProgressCB,), start_method='fork', **kwargs):
+    """ Fit `learn` (passing on `args` and `kwargs`) with `DDPCB` in `world_size` local processes connected with
+    gloo over localhost, each using `threads` threads (by default the cores are shared between them).  Callbacks
+    that are instances of `rank0_only` are only kept on rank 0.  Afterwards rank 0's weights, and its `MetricsCB`
+    values, are copied back to `learn`.
+    
+    The processes are forked by default, so `learn` and anything defined in a notebook can be used without
+    pickling.  With `start_method='spawn'` everything has to be picklable, and importable from a module
+    """
+    if threads is None: threads = max(1, os.cpu_count()//world_size)
+    port,path = _free_port(),Path(tempfile.mkdtemp())/'rank0.pth'
+    ctx = multiprocessing.get_context(start_method)
+    procs = [ctx.Process(target=_ddp_worker, args=(rank, world_size, port, threads, learn, rank0_only, path, args, kwargs))
+             for rank in range(world_size)]
+    for p in procs: p.start()
+    for p in procs: p.join()
+    if any(p.exitcode for p in procs): raise RuntimeError(f'ddp_fit failed, exit codes {[p.exitcode for p in procs]}')
+    res = torch.load(path)
+    shutil.rmtree(path.parent)
+    learn.model.load_state_dict(res['model'])
+    metrics = next((cb for cb in learn.cbs if isinstance(cb, MetricsCB)), None)
+    if metrics and res['values']: metrics.values = res['values']
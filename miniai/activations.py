@@ -99,14 +99,21 @@ def append_stats(hook, mod, inp, outp):
     hook.stats[2].append(acts.abs().histc(40,0,10))
 
 # %% ../nbs/10_Activations.ipynb 59
+def _hists(h):
+    """ The histograms of a hook as an (n_batches, n_bins) tensor, whether they were appended to a list or recorded
+    straight into a tensor
+    """
+    hs = h.stats[2]
+    return hs if isinstance(hs, torch.Tensor) else torch.stack(hs)
+
 # Thanks to @ste for initial version of histgram plotting code
-def get_hist(h): return torch.stack(h.stats[2]).t().float().log1p()
+def get_hist(h): return _hists(h).t().float().log1p()
 
 # %% ../nbs/10_Activations.ipynb 66
 def get_min(h):
     """ Calculate the proportion of activations in the smallest bin
     """
-    h_arr = torch.stack(h.stats[2]).t().float()
+    h_arr = _hists(h).t().float()
     return h_arr[0] / h_arr.sum(0)
 
 # %% ../nbs/10_Activations.ipynb 71
@@ -115,9 +122,52 @@ class ActivationStatsCB(HooksCallback):
     hookfunc since I think this gived greater flexibility moving forwards, although so many things are 
     now linked to the structure of the appstats function that it might be better to simply integrate that
     into this class
+
+    Without a `hookfunc` the stats (mean, std and histogram of the absolute values) are instead calculated on the
+    activations' own device, from a random `sample` of their elements if given, every `every` training batches.
+    They're written into a preallocated (n_records, n_layers, 2+bins) tensor, `recs`, with one copy back to the
+    cpu per recorded batch.  After fitting each hook's `stats` are views into `recs`
     """
-    def __init__(self, hookfunc, module_filter=fc.noop):
-        super().__init__(hookfunc, module_filter)
+    def __init__(self, hookfunc=None, module_filter=fc.noop, every=1, sample=None, bins=40, hist_range=(0,10)):
+        super().__init__(hookfunc or self._dev_stats, module_filter)
+        fc.store_attr('every,sample,bins,hist_range')
+        self.on_device = hookfunc is None
+
+    def before_fit(self, learn):
+        super().before_fit(learn)
+        if not self.on_device: return
+        for i,h in enumerate(self.hooks): h.idx = i
+        try: n = math.ceil(len(learn.dls.train)*learn.n_epochs/self.every)
+        except TypeError: n = 64
+        self.recs = torch.zeros(max(n, 1), len(self.hooks), 2+self.bins)
+        self.n,self.i,self._rec,self._stage = 0,0,False,None
+
+    def before_batch(self, learn): self._rec = self.on_device and learn.training and self.i%self.every==0
+
+    def _dev_stats(self, hook, mod, inp, outp):
+        if not self._rec: return
+        x = outp.detach().flatten()
+        if self.sample and x.numel()>self.sample: x = x[torch.randint(x.numel(), (self.sample,), device=x.device)]
+        x = x.float()
+        if self._stage is None: self._stage = torch.zeros(len(self.hooks), 2+self.bins, device=x.device)
+        # all on the device, nothing is synced until the whole stage is copied in `after_batch`
+        st = self._stage[hook.idx]
+        st[0],st[1] = x.mean(),x.std()
+        st[2:] = x.abs().histc(self.bins, *self.hist_range)
+
+    def after_batch(self, learn):
+        if not (self.on_device and learn.training): return
+        if self._rec and self._stage is not None:
+            if self.n==len(self.recs): self.recs = torch.cat([self.recs, torch.zeros_like(self.recs)])
+            self.recs[self.n].copy_(self._stage)
+            self.n += 1
+        self.i += 1
+
+    def after_fit(self, learn):
+        super().after_fit(learn)
+        if not self.on_device: return
+        recs = self.recs[:self.n]
+        for i,h in enumerate(self.hooks): h.stats = (recs[:,i,0], recs[:,i,1], recs[:,i,2:])
         
     def color_dim(self, figsize=(11,5)):
         fig,axes = get_grid(len(self), figsize=figsize)
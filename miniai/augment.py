@@ -2,7 +2,8 @@
 
 # %% auto 0
 __all__ = ['act_gr', 'summary', 'show_image_batch', 'CapturePreds', 'capture_preds', 'rand_erase', 'RandErase', 'rand_copy',
-           'RandCopy']
+           'RandCopy', 'batch_rand_erase', 'BatchRandErase', 'batch_rand_copy', 'BatchRandCopy', 'BatchAug',
+           'AugmentCB']
 
 # %% ../nbs/14_augment.ipynb 2
 import pickle,gzip,math,os,time,shutil,torch,random
@@ -65,23 +66,73 @@ def show_image_batch(self:Learner, max_n=9, cbs=None, **kwargs):
     show_images(self.batch[0][:max_n], **kwargs)
 
 # %% ../nbs/14_augment.ipynb 50
+class _Capture:
+    """ Preallocated buffer that each batch is copied straight into, rather than keeping a list of batches and
+    concatenating them at the end (which briefly needs twice the memory).  If `path` is given the buffer is a
+    memory mapped .npy file.  The buffer is sized from `n` (or the first batch if `n` is None) and grows if needed
+    """
+    def __init__(self, n=None, path=None): self.n,self.path,self.buf,self.i = n,path,None,0
+    
+    def _alloc(self, n, x):
+        shape = (n,)+tuple(x.shape[1:])
+        if self.path is None: return torch.empty(shape, dtype=x.dtype)
+        dtype = torch.empty(0, dtype=x.dtype).numpy().dtype
+        self.mm = np.lib.format.open_memmap(self.path, mode='w+', dtype=dtype, shape=shape)
+        return torch.from_numpy(self.mm)
+    
+    def add(self, x):
+        x = x.detach()
+        if self.buf is None: self.buf = self._alloc(max(self.n or 0, len(x)), x)
+        elif self.i+len(x) > len(self.buf):
+            if self.path is not None: raise ValueError(f'More than {len(self.buf)} items for the memory mapped file {self.path}')
+            new = self._alloc(max(self.i+len(x), 2*len(self.buf)), x)
+            new[:self.i] = self.buf[:self.i]
+            self.buf = new
+        # copy_ moves the batch to the cpu and writes it into place in one step
+        self.buf[self.i:self.i+len(x)].copy_(x)
+        self.i += len(x)
+    
+    def result(self):
+        if self.buf is None: return None
+        if self.path is not None: self.mm.flush()
+        return self.buf[:self.i]
+
+def _n_items(learn, bs):
+    "Number of items in the current dataloader, from its dataset if it has one or else the number of batches"
+    dl = learn.dls.train if learn.training else learn.dls.valid
+    if hasattr(dl, 'dataset'): return len(dl.dataset)
+    return len(dl)*bs if hasattr(dl, '__len__') else None
+
 class CapturePreds(Callback):
-    def before_fit(self, learn):
-        self.all_inps, self.all_preds, self.all_targs = [], [], []
+    """ Capture the predictions and targets (and inputs if `inps`) of every batch into preallocated tensors.  The
+    predictions can be streamed to a memory mapped .npy file at `mmap`, and reduced to just the `topk` logits (stored
+    as a tuple of values and indices) or the `argmax` to save memory
+    """
+    def __init__(self, inps=False, mmap=None, topk=None, argmax=False): fc.store_attr()
+    
+    def before_fit(self, learn): self.caps = None
         
     def after_batch(self, learn):
-        self.all_inps.append(to_cpu(learn.batch[0]))
-        self.all_preds.append(to_cpu(learn.preds))
-        self.all_targs.append(to_cpu(learn.batch[1]))
+        preds = learn.preds
+        if self.argmax: preds = preds.argmax(-1)
+        elif self.topk: preds = preds.topk(self.topk, dim=-1)
+        outs = (*preds, learn.batch[1]) if self.topk else (preds, learn.batch[1])
+        if self.inps: outs = outs + (learn.batch[0],)
+        if self.caps is None:
+            n = _n_items(learn, len(learn.batch[1]))
+            self.caps = [_Capture(n, self.mmap if i==0 else None) for i in range(len(outs))]
+        for c,o in zip(self.caps, outs): c.add(o)
     
     def after_fit(self, learn):
-        self.all_preds, self.all_targs, self.all_inps = map(torch.cat, 
-                                                            [self.all_preds,self.all_targs,self.all_inps]) 
+        res = [c.result() for c in self.caps] if self.caps else [None]*(3 + bool(self.topk))
+        if self.topk: res = [tuple(res[:2])] + res[2:]
+        self.all_preds, self.all_targs = res[:2]
+        self.all_inps = res[2] if self.inps else None
 
 # %% ../nbs/14_augment.ipynb 52
 @fc.patch
-def capture_preds(self: Learner, cbs=None, inps=False):
-    cp = CapturePreds()
+def capture_preds(self: Learner, cbs=None, inps=False, mmap=None, topk=None, argmax=False):
+    cp = CapturePreds(inps=inps, mmap=mmap, topk=topk, argmax=argmax)
     self.fit(1, train=False, cbs=[cp]+fc.L(cbs))
     res = cp.all_preds,cp.all_targs
     if inps: res = res+(cp.all_inps,)
@@ -142,3 +193,139 @@ class RandCopy(nn.Module):
         super().__init__()
         self.pct,self.max_num = pct,max_num
     def forward(self, x): return rand_copy(x, self.pct, self.max_num)
+
+# %% ../nbs/14_augment.ipynb 127
+def _rand_rects(x, pct, max_num, n_corners=1, generator=None):
+    """ `n_corners` sets of top left corners, each (n, max_num), of random rectangles of `pct` of the size of the
+    images in the batch `x`, and whether each image has any.  Each image uses a random 0 to `max_num` rectangles, and
+    the ones after those repeat the first, so writing them again changes nothing.  The random numbers come from
+    `generator` if it's given
+    """
+    n,(h,w),dev = len(x),x.shape[-2:],x.device
+    szx,szy = int(pct*h),int(pct*w)
+    ri = partial(torch.randint, generator=generator, device=dev)
+    num = ri(0, max_num+1, (n, 1))
+    ks = torch.arange(max_num, device=dev)
+    sel = torch.where(ks<num, ks, 0)
+    corners = [(ri(0, h-szx+1, (n, max_num)).gather(1, sel),ri(0, w-szy+1, (n, max_num)).gather(1, sel))
+               for _ in range(n_corners)]
+    return corners,szx,szy,num[:,0]>0,sel
+
+def _rect_idx(stx, sty, szx, szy):
+    "Index tensors for the pixels of the rectangles, to index an (n, h, w, c) batch with"
+    rows = (stx[...,None] + torch.arange(szx, device=stx.device))[...,None]
+    cols = (sty[...,None] + torch.arange(szy, device=sty.device))[...,None,:]
+    return torch.arange(len(stx), device=stx.device)[:,None,None,None],rows,cols
+
+def batch_rand_erase(x, pct=0.2, max_num=4, generator=None):
+    """ Like `rand_erase`, but each image in the batch gets its own 0 to `max_num` rectangles, filled with noise with
+    the mean and std of that image (and clamped to its range).  The random numbers are all made on the device of `x`
+    and the rectangles are written with a single indexed assignment, so there are no python loops and nothing waits
+    for the device.  As with `rand_erase`, `x` is changed in place
+    """
+    if max_num==0: return x
+    [(stx,sty)],szx,szy,has,sel = _rand_rects(x, pct, max_num, generator=generator)
+    xp = x.permute(0, 2, 3, 1)
+    idx = _rect_idx(stx, sty, szx, szy)
+    xf = x.flatten(1)
+    xm = xf.mean(1)
+    xs = ((xf*xf).mean(1) - xm*xm).clamp_min(0).sqrt()
+    st = lambda o: o[:,None,None,None,None]
+    noise = torch.randn(len(x), max_num, szx, szy, x.shape[1], dtype=x.dtype, device=x.device, generator=generator)
+    noise = (noise*st(xs) + st(xm)).clamp(st(xf.amin(1)), st(xf.amax(1)))
+    # the repeated rectangles get the same noise, and images with no rectangles get their own pixels back
+    noise = noise[idx[0][...,0,0], sel]
+    xp[idx] = torch.where(st(has), noise, xp[idx])
+    return x
+
+class BatchRandErase(nn.Module):
+    def __init__(self, pct=0.2, max_num=4):
+        super().__init__()
+        self.pct,self.max_num = pct,max_num
+    def forward(self, x): return batch_rand_erase(x, self.pct, self.max_num)
+
+# %% ../nbs/14_augment.ipynb 128
+def batch_rand_copy(x, pct=0.2, max_num=4, generator=None):
+    """ Like `rand_copy`, but each image in the batch gets its own 0 to `max_num` rectangles, each copied from another
+    random place in the same image.  All the patches are read before any are written, so they all come from the
+    original image.  As with `rand_copy`, `x` is changed in place
+    """
+    if max_num==0: return x
+    [(stx,sty),(srx,sry)],szx,szy,has,_ = _rand_rects(x, pct, max_num, n_corners=2, generator=generator)
+    # images with no rectangles copy the first one onto itself
+    srx,sry = torch.where(has[:,None], srx, stx),torch.where(has[:,None], sry, sty)
+    xp = x.permute(0, 2, 3, 1)
+    xp[_rect_idx(stx, sty, szx, szy)] = xp[_rect_idx(srx, sry, szx, szy)]
+    return x
+
+class BatchRandCopy(nn.Module):
+    def __init__(self, pct=0.2, max_num=4):
+        super().__init__()
+        self.pct,self.max_num = pct,max_num
+    def forward(self, x): return batch_rand_copy(x, self.pct, self.max_num)
+
+# %% ../nbs/14_augment.ipynb 138
+class BatchAug(nn.Module):
+    """ Augment a batch of images in a few batched steps: integer images are converted to floats in [0,1] and
+    normalised with `mean` and `std`, then a random crop of the image padded by `pad` pixels, a horizontal flip (with
+    probability `p_flip`), a rotation of up to `max_rot` degrees, a zoom by a factor in `scale` and a shear of up to
+    `max_shear` are combined into one affine transform per image, applied with a single `grid_sample`.  Then come
+    `batch_rand_erase` and `batch_rand_copy` (if `max_erase` or `max_copy`), and finally conversion to `dtype`.
+
+    The random parameters for the whole batch are made together, on the device of the batch.  With `seed` they come
+    from a generator seeded with it (at the first batch and at each `reset`), so the augmentation is the same every
+    time
+    """
+    def __init__(self, pad=0, p_flip=0., max_rot=0., scale=(1.,1.), max_shear=0., max_erase=0, erase_pct=0.2,
+                 max_copy=0, copy_pct=0.2, mean=None, std=None, dtype=None, mode='bilinear', padding_mode='zeros',
+                 seed=None):
+        super().__init__()
+        fc.store_attr()
+        self.gen = None
+
+    def reset(self): self.gen = None
+
+    def _generator(self, dev):
+        if self.seed is None: return None
+        if self.gen is None or self.gen.device!=dev: self.gen = torch.Generator(dev).manual_seed(self.seed)
+        return self.gen
+
+    def _affine(self, x, g):
+        "The affine matrices (n, 2, 3), mapping the output pixels to the input ones as `affine_grid` wants"
+        n,(h,w),dev = len(x),x.shape[-2:],x.device
+        u = lambda lo,hi: lo + torch.rand(n, generator=g, device=dev)*(hi-lo)
+        rot = u(-self.max_rot, self.max_rot)*math.pi/180
+        shear,sc = u(-self.max_shear, self.max_shear),u(*self.scale)
+        flip = torch.where(torch.rand(n, generator=g, device=dev)<self.p_flip, -1., 1.)
+        cos,sin = rot.cos()/sc,rot.sin()/sc
+        # rotation @ shear @ flip, in pixels; the off diagonal terms are rescaled to the -1..1 coords of `affine_grid`
+        a = torch.stack([torch.stack([cos*flip, (cos*shear - sin)*h/w], 1),
+                         torch.stack([sin*flip*w/h, sin*shear + cos], 1)], 1)
+        t = torch.randint(-self.pad, self.pad+1, (n, 2), generator=g, device=dev) * 2 / tensor([w, h], device=dev)
+        return torch.cat([a, t[...,None].to(a.dtype)], 2)
+
+    def forward(self, x):
+        g = self._generator(x.device)
+        if not x.is_floating_point(): x = x.float()/255
+        if self.mean is not None:
+            x = (x - torch.as_tensor(self.mean, device=x.device).reshape(-1,1,1)) / torch.as_tensor(self.std, device=x.device).reshape(-1,1,1)
+        if self.pad or self.p_flip or self.max_rot or self.max_shear or tuple(self.scale)!=(1.,1.):
+            grid = F.affine_grid(self._affine(x, g).to(x.dtype), x.shape, align_corners=False)
+            x = F.grid_sample(x, grid, mode=self.mode, padding_mode=self.padding_mode, align_corners=False)
+        if self.max_erase: x = batch_rand_erase(x, self.erase_pct, self.max_erase, generator=g)
+        if self.max_copy: x = batch_rand_copy(x, self.copy_pct, self.max_copy, generator=g)
+        return x if self.dtype is None else x.to(self.dtype)
+
+class AugmentCB(BatchTransformCB):
+    """ Augment the inputs of the training batches with `aug` (such as a `BatchAug`).  It runs after `DeviceCB`, so the
+    augmentation is done on the device the batch has been moved to
+    """
+    order = DeviceCB.order+1
+    def __init__(self, aug, on_train=True, on_val=False):
+        super().__init__(self._tfm, on_train, on_val)
+        self.aug = aug
+
+    def _tfm(self, b): return (self.aug(b[0]), *b[1:])
+
+    def before_fit(self, learn):
+        if hasattr(self.aug, 'reset'): self.aug.reset()
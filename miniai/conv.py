@@ -1,10 +1,11 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/07_Convolutions.ipynb.
 
 # %% auto 0
-__all__ = ['def_device', 'conv', 'to_device', 'collate_device']
+__all__ = ['def_device', 'conv', 'BatchMover', 'to_device', 'collate_device']
 
 # %% ../nbs/07_Convolutions.ipynb 2
 import pickle,gzip,math,os,time,shutil,torch,matplotlib as mpl, numpy as np
+import fastcore.all as fc
 import pandas as pd,matplotlib.pyplot as plt
 from pathlib import Path
 from torch import tensor
@@ -12,6 +13,7 @@ from torch import nn
 
 from torch.utils.data import DataLoader,default_collate
 from typing import Mapping
+import dataclasses
 
 from .training import *
 from .datasets import *
@@ -35,12 +37,72 @@ def conv(
 def_device = "cpu" if torch.backends.mps.is_available() else "cuda" if torch.cuda.is_available() \
     else "cpu"
 
-def to_device(x, device=def_device):
-    # if x is a mapping then each of mapping targets needs to be moved to the device.  Needed to accomodate
-    # huggingface examples.  Note also that the applications of type(x) prior to the (o.to(dev) for o in x)
-    # results in the recreation of the tuple or list from the second part, which is a generator.
-    if isinstance(x, torch.Tensor): return x.to(device)
-    if isinstance(x, Mapping): return {k: v.to_device(device) for k, v in x.items()}
-    return type(x)(to_device(o, device) for o in x)
+class _Mismatch(Exception): pass
+
+def _compile(x, leaf):
+    """ Build a function that applies `leaf` to every tensor in a batch with the same structure as `x`.  The
+    structure is only checked with cheap `type(o) is` and `len` checks, and `_Mismatch` is raised if it differs
+    """
+    typ = type(x)
+    if isinstance(x, torch.Tensor): return leaf
+    if isinstance(x, Mapping):
+        fs = {k: _compile(v, leaf) for k, v in x.items()}
+        def _f(o):
+            if type(o) is not typ or len(o)!=len(fs): raise _Mismatch()
+            return {k: f(o[k]) for k, f in fs.items()}
+    elif dataclasses.is_dataclass(x):
+        fs = {f.name: _compile(getattr(x, f.name), leaf) for f in dataclasses.fields(x)}
+        def _f(o):
+            if type(o) is not typ: raise _Mismatch()
+            return dataclasses.replace(o, **{k: f(getattr(o, k)) for k, f in fs.items()})
+    elif isinstance(x, (list, tuple)):
+        fs = [_compile(o, leaf) for o in x]
+        # namedtuples are created from positional args, lists and tuples from an iterable
+        mk = (lambda o: typ(*o)) if hasattr(x, '_fields') else typ
+        def _f(o):
+            if type(o) is not typ or len(o)!=len(fs): raise _Mismatch()
+            return mk([f(v) for f, v in zip(fs, o)])
+    else:
+        # anything else (ints, strings, None...) is passed through unchanged
+        def _f(o):
+            if type(o) is not typ: raise _Mismatch()
+            return o
+    return _f
+
+class BatchMover:
+    """ Move a batch of tensors, arbitrarily nested in dicts, lists, tuples, namedtuples and dataclasses, to `device`.
+    Floating point tensors are optionally cast to `dtype` and 4d tensors converted to `memory_format`.  The
+    structure of the first batch is compiled into a function, so later batches with the same structure skip the
+    isinstance checks; if the structure changes it is simply compiled again
+    """
+    def __init__(self, device=def_device, non_blocking=False, memory_format=None, dtype=None, detach=False,
+                 pin_memory=False):
+        fc.store_attr()
+        self.f = None
+        
+    def _move(self, o):
+        if not isinstance(o, torch.Tensor): raise _Mismatch()
+        if self.detach: o = o.detach()
+        if self.pin_memory: o = o.pin_memory()
+        mf = self.memory_format if self.memory_format is not None and o.dim()==4 else torch.preserve_format
+        return o.to(self.device, dtype=self.dtype if o.is_floating_point() else None,
+                    non_blocking=self.non_blocking, memory_format=mf)
+    
+    def __call__(self, x):
+        if self.f is not None:
+            try: return self.f(x)
+            except (_Mismatch, KeyError, AttributeError, TypeError): pass
+        self.f = _compile(x, self._move)
+        return self.f(x)
+
+_movers = {}
+def to_device(x, device=def_device, non_blocking=False, memory_format=None, dtype=None, detach=False, pin_memory=False):
+    """ Move a batch to `device` (see `BatchMover`).  A `BatchMover` is kept for each set of arguments so that the
+    structure of the batches is only worked out once
+    """
+    k = (str(device), non_blocking, memory_format, dtype, detach, pin_memory)
+    mv = _movers.get(k)
+    if mv is None: mv = _movers[k] = BatchMover(device, non_blocking, memory_format, dtype, detach, pin_memory)
+    return mv(x)
 
 def collate_device(b): return to_device(default_collate(b))
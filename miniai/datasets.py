@@ -2,10 +2,11 @@
 
 # %% ../nbs/05_Datasets_and_Plotting.ipynb 1
 from __future__ import annotations
-import pickle,gzip,math,os,time,shutil,torch,matplotlib as mpl,numpy as np,matplotlib.pyplot as plt
+import pickle,gzip,math,os,time,shutil,json,hashlib,inspect,uuid,torch,matplotlib as mpl,numpy as np,matplotlib.pyplot as plt
 from pathlib import Path
 from operator import itemgetter
 from itertools import zip_longest
+from functools import wraps,partial
 import fastcore.all as fc
 
 from torch import tensor,nn,optim
@@ -15,7 +16,8 @@ import torch.nn.functional as F
 from datasets import load_dataset,load_dataset_builder
 
 # %% auto 0
-__all__ = ['inplace', 'collate_dict', 'show_image', 'subplots', 'get_grid', 'show_images']
+__all__ = ['inplace', 'collate_dict', 'show_image', 'subplots', 'get_grid', 'show_images', 'tensor_chunks', 'MmapDataset',
+           'DsCache', 'cache_dd']
 
 # %% ../nbs/05_Datasets_and_Plotting.ipynb 36
 def inplace(f):
@@ -23,6 +25,7 @@ def inplace(f):
     without a return statenent) to then be used in an application that required a return.  Do this function
     is a wrapper of another function that simply executes the function and then returns the modified input
     """
+    @wraps(f)
     def _f(b):
         f(b)
         return b
@@ -149,3 +152,134 @@ def show_images(
     for img, t, ax in zip_longest(imgs, titles or [], axs[:len(imgs)]):
         show_image(img, ax, t, **kwargs)
     
+
+# %% ../nbs/05_Datasets_and_Plotting.ipynb 88
+def tensor_chunks(ds, chunk_sz=1024):
+    """ Yield the transformed items of a huggingface dataset `chunk_sz` at a time, as a tuple with a tensor for
+    each feature (in the same order as `collate_dict`)
+    """
+    def _t(o): return o if isinstance(o, torch.Tensor) else torch.stack(o) if isinstance(o[0], torch.Tensor) else tensor(o)
+    for i in range(0, len(ds), chunk_sz):
+        b = ds[i:i+chunk_sz]
+        yield tuple(_t(b[k]) for k in ds.features)
+
+# %% ../nbs/05_Datasets_and_Plotting.ipynb 89
+class MmapDataset:
+    """ Dataset of tensors memory mapped from a `DsCache` entry.  Indexing with an int or slice returns views of
+    the mapped files, while a list or tensor of indices gathers a batch with a single read per feature
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header = json.loads((self.path/'header.json').read_text())
+        self._tensors = None
+        
+    @property
+    def features(self): return self.header['features']
+    def __len__(self): return self.header['n']
+    
+    @property
+    def tensors(self):
+        # mode 'c' (copy on write) gives writable arrays, so torch doesn't warn, but nothing is ever written back
+        if self._tensors is None:
+            self._tensors = tuple(torch.from_numpy(np.load(self.path/f'{k}.npy', mmap_mode='c')) for k in self.features)
+        return self._tensors
+    
+    def __getitem__(self, i):
+        if isinstance(i, list): i = tensor(i)
+        return tuple(o[i] for o in self.tensors)
+    
+    # don't pickle the mapped data when sending to worker processes, each process maps the files again
+    def __getstate__(self): return {**self.__dict__, '_tensors': None}
+
+# %% ../nbs/05_Datasets_and_Plotting.ipynb 90
+def _code_src(c):
+    "The bytecode, constants (including nested code) and names of the code object `c`"
+    consts = tuple(_code_src(o) if inspect.iscode(o) else o for o in c.co_consts)
+    return repr((c.co_code, consts, c.co_names))
+
+def _arg_src(o):
+    "Description of an argument of a `partial`, with any functions in it described by `_tfm_src`"
+    if callable(o): return _tfm_src(o)
+    if isinstance(o, (list,tuple)): return f'{type(o).__name__}({", ".join(_arg_src(v) for v in o)})'
+    if isinstance(o, dict): return '{' + ', '.join(f'{k!r}: {_arg_src(v)}' for k,v in o.items()) + '}'
+    return repr(o)
+
+def _tfm_src(f):
+    """ The source of the transform `f`, or its bytecode if the source isn't available.  A `partial` is described by
+    its function and arguments.  None of these contain memory addresses, so the cache key of a function or a `partial`
+    is the same in every process
+    """
+    if f is None: return ''
+    if isinstance(f, partial): return f'partial({_tfm_src(f.func)}, {_arg_src(f.args)}, {_arg_src(f.keywords)})'
+    try: return inspect.getsource(f)
+    except (OSError, TypeError): pass
+    code = getattr(inspect.unwrap(f), '__code__', None)
+    return repr(f) if code is None else _code_src(code)
+
+class DsCache:
+    """ Cache of preprocessed datasets in `path`, limited to `max_bytes` and `max_entries` (`None` for no limit)
+    with the least recently used entries evicted first
+    """
+    def __init__(self, path='~/.cache/miniai/datasets', max_bytes=None, max_entries=None):
+        self.path = Path(path).expanduser()
+        self.path.mkdir(parents=True, exist_ok=True)
+        fc.store_attr('max_bytes,max_entries')
+        
+    def key(self, ds):
+        "Hash of the dataset fingerprint and the source of its transform"
+        tfm = ds.format.get('format_kwargs', {}).get('transform')
+        return hashlib.sha1(f'{ds._fingerprint}\n{_tfm_src(tfm)}'.encode()).hexdigest()[:16]
+    
+    def entries(self):
+        "Cached entries as (path, size in bytes), least recently used first"
+        hdrs = sorted(self.path.glob('*/header.json'), key=lambda o: o.stat().st_mtime)
+        return [(o.parent, json.loads(o.read_text())['nbytes']) for o in hdrs]
+    
+    def evict(self, nbytes=0):
+        "Remove least recently used entries until there is space for a new entry of `nbytes`"
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            raise ValueError(f'Entry of {nbytes} bytes is larger than the cache limit of {self.max_bytes} bytes')
+        ents = self.entries()
+        while ents and ((self.max_entries is not None and len(ents) >= self.max_entries) or
+                        (self.max_bytes is not None and sum(o[1] for o in ents)+nbytes > self.max_bytes)):
+            shutil.rmtree(ents.pop(0)[0], ignore_errors=True)
+    
+    def __call__(self, ds, chunk_sz=1024):
+        "Return the cached `MmapDataset` for `ds`, running the transform and writing it to the cache if needed"
+        dest = self.path/self.key(ds)
+        if not (dest/'header.json').exists(): self._write(ds, dest, chunk_sz)
+        # touch the header to mark the entry as recently used
+        (dest/'header.json').touch()
+        return MmapDataset(dest)
+    
+    def _write(self, ds, dest, chunk_sz):
+        # write to a temporary directory and rename it at the end, so other processes never see a partial entry
+        tmp = self.path/f'.{dest.name}-{uuid.uuid4().hex[:8]}'
+        tmp.mkdir()
+        try:
+            chunks = tensor_chunks(ds, chunk_sz)
+            first = next(chunks)
+            shapes = [(len(ds),)+tuple(o.shape[1:]) for o in first]
+            nbytes = sum(math.prod(s)*o.element_size() for s,o in zip(shapes, first))
+            self.evict(nbytes)
+            arrs = [np.lib.format.open_memmap(tmp/f'{k}.npy', mode='w+', dtype=o.numpy().dtype, shape=s)
+                    for k,o,s in zip(ds.features, first, shapes)]
+            i = 0
+            for c in [first, *chunks]:
+                for a,o in zip(arrs, c): a[i:i+len(o)] = o.numpy()
+                i += len(c[0])
+            for a in arrs: a.flush()
+            del arrs
+            hdr = dict(features=list(ds.features), n=len(ds), nbytes=nbytes, fingerprint=ds._fingerprint,
+                       shapes=shapes, dtypes=[str(o.dtype) for o in first])
+            (tmp/'header.json').write_text(json.dumps(hdr))
+            try: tmp.rename(dest)
+            # another process may have written the same entry first
+            except OSError: pass
+        finally: shutil.rmtree(tmp, ignore_errors=True)
+
+# %% ../nbs/05_Datasets_and_Plotting.ipynb 91
+def cache_dd(dd, cache=None, chunk_sz=1024):
+    "Return a dict of `MmapDataset`s, one for each dataset in `dd`, from `cache` (a default `DsCache` if `None`)"
+    if cache is None: cache = DsCache()
+    return {k: cache(ds, chunk_sz=chunk_sz) for k,ds in dd.items()}
@@ -1,7 +1,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/18_FID.ipynb.
 
 # %% auto 0
-__all__ = ['ImageEval']
+__all__ = ['tr_sqrts', 'RunningStats', 'Reservoir', 'StreamStatsCB', 'ImageEval']
 
 # %% ../nbs/18_FID.ipynb 3
 import pickle,gzip,math,os,time,shutil,torch,random
@@ -34,23 +34,23 @@ from .augment import *
 from .accel import *
 
 # %% ../nbs/18_FID.ipynb 40
-def _sqrtm_newton_schulz(mat, num_iters=100):
-    """ This is the way to generate the square root of a matrix in an iterative manner
-    It is not actually used but the  scipy library contains this function and that is used
-    instead
+def _sqrtm_newton_schulz(mat, num_iters=100, check_every=5, tol=1e-6):
+    """ This is the way to generate the square root of a matrix in an iterative manner.  `mat` can be a batch
+    of matrices (..., n, n).  The error is only checked every `check_every` iterations since it needs an
+    extra matmul, and we stop once every matrix in the batch is within `tol`
     """
-    mat_nrm = mat.norm()
     mat = mat.double()
+    mat_nrm = mat.norm(dim=(-2,-1), keepdim=True)
     Y = mat/mat_nrm
-    n = len(mat)
-    I = torch.eye(n, n).to(mat)
-    Z = torch.eye(n, n).to(mat)
+    I = torch.eye(mat.shape[-1]).to(mat).expand_as(mat)
+    Z = I
 
     for i in range(num_iters):
         T = (3*I - Z@Y)/2
         Y,Z = Y@T,T@Z
-        res = Y*mat_nrm.sqrt()
-        if ((mat-(res@res)).norm()/mat_nrm).abs()<=1e-6: break
+        if (i+1)%check_every==0 or i==num_iters-1:
+            res = Y*mat_nrm.sqrt()
+            if ((mat-res@res).norm(dim=(-2,-1))/mat_nrm[...,0,0]).max()<=tol: break
     return res
 
 # %% ../nbs/18_FID.ipynb 41
@@ -61,10 +61,25 @@ def _calc_stats(feats):
     feats = feats.squeeze()
     return feats.mean(0),feats.T.cov()
 
-def _calc_fid(m1,c1,m2,c2):
-#     csr = _sqrtm_newton_schulz(c1@c2)
-    csr = tensor(linalg.sqrtm(c1@c2, 256).real)
-    return (((m1-m2)**2).sum() + c1.trace() + c2.trace() - 2*csr.trace()).item()
+def _tr_sqrt_scipy(c1, c2): return tensor(linalg.sqrtm((c1@c2).cpu(), 256).real).trace()
+
+def _tr_sqrt_eig(c1, c2):
+    """ FID only needs the trace of sqrt(c1@c2), which is the sum of the square roots of its eigenvalues.
+    These are the same as those of the symmetric PSD matrix sqrt(c1)@c2@sqrt(c1), so we can use `eigh`
+    """
+    w,v = torch.linalg.eigh(c1)
+    s1 = (v*w.clamp(min=0).sqrt())@v.T
+    return torch.linalg.eigvalsh(s1@c2@s1).clamp(min=0).sqrt().sum()
+
+def _tr_sqrt_newton_schulz(c1, c2): return _sqrtm_newton_schulz(c1@c2).trace()
+
+# Ways to calculate the trace of the square root of c1@c2, `_calc_fid` also accepts a function
+tr_sqrts = dict(scipy=_tr_sqrt_scipy, eig=_tr_sqrt_eig, newton_schulz=_tr_sqrt_newton_schulz)
+
+def _calc_fid(m1,c1,m2,c2, sqrtm='eig'):
+    m1,c1,m2,c2 = (o.double() for o in (m1,c1,m2,c2))
+    tr_sqrt = tr_sqrts[sqrtm] if isinstance(sqrtm, str) else sqrtm
+    return (((m1-m2)**2).sum() + c1.trace() + c2.trace() - 2*tr_sqrt(c1, c2)).item()
 
 # %% ../nbs/18_FID.ipynb 44
 def _squared_mmd(x, y):
@@ -77,32 +92,165 @@ def _squared_mmd(x, y):
     return kxx_sum/m/(m-1) + kyy_sum/n/(n-1) - kxy_sum*2/m/n
 
 # %% ../nbs/18_FID.ipynb 45
-def _calc_kid(x, y, maxs=50):
+def _subsets(x, n):
+    """ Split `x` into `n` contiguous subsets (as even as possible) stacked into one (n,m,d) tensor, zero padded,
+    along with a mask of the rows that are real (None if they're all the same size, so no copy is needed)
+    """
+    xs = x.shape[0]
+    if xs%n==0: return x.view(n, xs//n, -1),None
+    bounds = tensor([round(i*xs/n) for i in range(n+1)])
+    m = (bounds[1:]-bounds[:-1]).max()
+    idx = bounds[:-1,None] + torch.arange(m)
+    mask = (idx<bounds[1:,None]).to(x)
+    return x[idx.clamp(max=xs-1)]*mask[...,None], mask
+
+def _kern_sum(a, b, ma, mb, tile):
+    """ Sum of the polynomial kernel between the real rows of each subset of `a` and of `b`.  They're done `tile`
+    rows of each at a time so only (n,tile,tile) of the kernel matrices ever exist at once.  When `b` is `a` the
+    kernel is symmetric, so only the tiles on and above the diagonal are done, and the diagonal is left out
+    """
+    same,tot = a is b,0.
+    one = a.new_ones(1, 1, 1)
+    for i in range(0, a.shape[-2], tile):
+        for j in range(i if same else 0, b.shape[-2], tile):
+            # 1 + a@b.T/d in one op and cubed in place: on the cpu the elementwise ops cost as much as the matmul
+            k = torch.baddbmm(one, a[:,i:i+tile], b[:,j:j+tile].transpose(-2,-1), alpha=1/a.shape[-1]).pow_(3)
+            if same and i==j: k.diagonal(0, -2, -1).zero_()
+            k = k.sum(-1) if mb is None else (k@mb[:,j:j+tile,None]).squeeze(-1)
+            s = (k if ma is None else k*ma[:,i:i+tile]).sum(-1)
+            tot = tot + (2*s if same and i!=j else s)
+    return tot
+
+def _calc_kid(x, y, maxs=50, tile=512, std=False):
+    """ KID is the average of the squared MMD between subsets of `x` and `y` (of up to around `maxs` each). All the
+    subsets are done at once.  With `std` also returns the std of the MMDs across subsets
+    """
     xs,ys = x.shape[0],y.shape[0]
     n = max(math.ceil(min(xs/maxs, ys/maxs)), 4)
-    mmd = 0.
-    for i in range(n):
-        cur_x = x[round(i*xs/n) : round((i+1)*xs/n)]
-        cur_y = y[round(i*ys/n) : round((i+1)*ys/n)]
-        mmd += _squared_mmd(cur_x, cur_y)
-    return (mmd/n).item()
+    (x,mx),(y,my) = _subsets(x.float(), n),_subsets(y.float(), n)
+    m = x.shape[1] if mx is None else mx.sum(-1)
+    p = y.shape[1] if my is None else my.sum(-1)
+    kxx_sum,kyy_sum,kxy_sum = _kern_sum(x, x, mx, mx, tile),_kern_sum(y, y, my, my, tile),_kern_sum(x, y, mx, my, tile)
+    mmd = kxx_sum/m/(m-1) + kyy_sum/p/(p-1) - kxy_sum*2/m/p
+    return (mmd.mean().item(), mmd.std(correction=0).item()) if std else mmd.mean().item()
 
 # %% ../nbs/18_FID.ipynb 48
+class RunningStats:
+    """ Running mean and covariance of a stream of batches of features.  `m2` is the sum of the outer
+    products of the centred features, so the covariance is just `m2/(n-1)`.  Everything is in float64, including each
+    batch's mean and products, since in float32 they'd lose the precision the float64 totals are there to keep
+    """
+    def __init__(self, n=0, mean=None, m2=None): fc.store_attr()
+
+    def update(self, x):
+        x = x.detach().flatten(1).double()
+        nb = len(x)
+        if not nb: return self
+        if self.mean is None:
+            self.mean = x.new_zeros(x.shape[1])
+            self.m2 = x.new_zeros(x.shape[1], x.shape[1])
+        n = self.n+nb
+        mb = x.mean(0)
+        delta = mb-self.mean
+        # Chan et al's correction to m2, n_a*n_b/n * outer(delta,delta), is added as an extra row of the
+        # centred batch so one matmul (and one float64 add) does it all
+        xc = torch.cat([x-mb, (delta*math.sqrt(self.n*nb/n))[None]])
+        self.m2 += xc.T@xc
+        self.mean += delta*(nb/n)
+        self.n = n
+        return self
+
+    @property
+    def cov(self): return self.m2/(self.n-1)
+    def stats(self): return self.mean.cpu(),self.cov.cpu()
+
+class Reservoir:
+    """ Uniform random sample of at most `k` rows from a stream of batches (Vitter's algorithm R).  Only the
+    rows that make it into the sample are copied to the cpu
+    """
+    def __init__(self, k=4000, generator=None):
+        fc.store_attr()
+        self.n,self.buf = 0,None
+
+    def update(self, x):
+        x = x.detach().flatten(1)
+        if self.buf is None: self.buf = torch.empty(self.k, x.shape[1])
+        nfill = min(max(self.k-self.n, 0), len(x))
+        if nfill: self.buf[self.n:self.n+nfill] = x[:nfill].float().cpu()
+        nrest = len(x)-nfill
+        if nrest:
+            # item number i (1-based) replaces a random slot with probability k/i
+            cnt = torch.arange(self.n+nfill+1, self.n+len(x)+1)
+            j = (torch.rand(nrest, generator=self.generator)*cnt).long()
+            keep = (j<self.k).nonzero().squeeze(1)
+            if len(keep):
+                rows = x[keep.to(x.device)+nfill].float().cpu()
+                # in stream order, so later rows overwrite earlier ones landing in the same slot
+                for r,s in zip(rows, j[keep].tolist()): self.buf[s] = r
+        self.n += len(x)
+        return self
+
+    @property
+    def sample(self): return self.buf[:min(self.n, self.k)] if self.buf is not None else None
+
+class StreamStatsCB(Callback):
+    """ Accumulate the running stats of the predictions (ie the features) and a reservoir sample of them """
+    def __init__(self, kid_sz=4000): fc.store_attr()
+    def before_fit(self, learn): self.stats,self.res = RunningStats(),Reservoir(self.kid_sz)
+    def after_batch(self, learn):
+        self.stats.update(learn.preds)
+        self.res.update(learn.preds)
+
+# %% ../nbs/18_FID.ipynb 53
 class ImageEval:
     """ Class to calculate FID and KID.  In both cases the model should be a classifier
     or similar that is trained to catagorise images.  The sample passed to the fid or kid 
     methods should be the generated images|
+    With `stream` the features are never all held in memory: FID uses running stats and KID a random
+    sample of `kid_sz` features.  The reference stats are saved to (and loaded from) `stats_path` if given.
+    `sqrtm` is the method used to get the trace of the matrix square root for FID (see `tr_sqrts`)
     """
-    def __init__(self, model, dls, cbs=None):
+    def __init__(self, model, dls, cbs=None, stream=False, stats_path=None, kid_sz=4000, bs=512, sqrtm='eig'):
         """ 
         """
+        fc.store_attr('stream,kid_sz,bs,sqrtm')
         self.learn = TrainLearner(model, dls, loss_func=fc.noop, cbs=cbs, opt_func=None)
-        self.feats = self.learn.capture_preds()[0].float().cpu().squeeze()
-        self.stats = _calc_stats(self.feats)
+        if stats_path and Path(stats_path).exists(): return self.load(stats_path)
+        if stream:
+            scb = self._run_stream()
+            self.stats,self.feats = scb.stats.stats(),scb.res.sample
+        else:
+            self.feats = self.learn.capture_preds()[0].float().cpu().squeeze()
+            self.stats = _calc_stats(self.feats)
+        if stats_path: self.save(stats_path)
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        torch.save(dict(stats=self.stats, feats=self.feats), path)
+
+    def load(self, path):
+        d = torch.load(path)
+        self.stats,self.feats = d['stats'],d['feats']
+
+    def _samp_dls(self, samp):
+        """ A tensor of samples is passed through in batches of `bs`, anything else is used as the dataloader """
+        if isinstance(samp, torch.Tensor): samp = [(o, tensor([0])) for o in samp.split(self.bs if self.stream else len(samp))]
+        return DataLoaders([], samp)
+
+    def _run_stream(self, samp=None):
+        if samp is not None: self.learn.dls = self._samp_dls(samp)
+        scb = StreamStatsCB(self.kid_sz)
+        self.learn.fit(1, train=False, cbs=[scb])
+        return scb
 
     def get_feats(self, samp):
-        self.learn.dls = DataLoaders([],[(samp, tensor([0]))])
+        self.learn.dls = self._samp_dls(samp)
         return self.learn.capture_preds()[0].float().cpu().squeeze()
 
-    def fid(self, samp): return _calc_fid(*self.stats, *_calc_stats(self.get_feats(samp)))
-    def kid(self, samp): return _calc_kid(self.feats, self.get_feats(samp))
+    def fid(self, samp):
+        if self.stream: return _calc_fid(*self.stats, *self._run_stream(samp).stats.stats(), sqrtm=self.sqrtm)
+        return _calc_fid(*self.stats, *_calc_stats(self.get_feats(samp)), sqrtm=self.sqrtm)
+
+    def kid(self, samp, std=False):
+        if self.stream: return _calc_kid(self.feats, self._run_stream(samp).res.sample, std=std)
+        return _calc_kid(self.feats, self.get_feats(samp), std=std)
@@ -67,18 +67,55 @@ class BatchTransformCB(Callback):
             learn.batch = self.tfm(learn.batch)
 
 # %% ../nbs/11_initializing.ipynb 101
+def _general_relu_(x, leak, sub, maxv):
+    F.leaky_relu_(x, leak) if leak is not None else F.relu_(x)
+    if sub is not None: x.sub_(sub)
+    if maxv is not None: x.clamp_max_(maxv)
+    return x
+
+class _GeneralReluFn(torch.autograd.Function):
+    """ GeneralRelu done in place on its input.  Rather than a copy of the input, all that is kept for the backward
+    pass is a bool mask of where it was positive (and one of where it was clipped at `maxv`)
+    """
+    @staticmethod
+    def forward(ctx, x, leak, sub, maxv):
+        pos = x>0
+        _general_relu_(x, leak, sub, None)
+        clip = None
+        if maxv is not None:
+            clip = x>maxv
+            x.clamp_max_(maxv)
+        ctx.mark_dirty(x)
+        ctx.save_for_backward(pos, clip)
+        ctx.leak = leak or 0.
+        return x
+
+    @staticmethod
+    def backward(ctx, grad):
+        pos,clip = ctx.saved_tensors
+        grad = torch.where(pos, grad, grad*ctx.leak)
+        if clip is not None: grad = grad.masked_fill(clip, 0.)
+        return grad, None, None, None
+
 class GeneralRelu(nn.Module):
-    def __init__(self, leak=None, sub=None, maxv=None):
+    """ A leaky relu, shifted down by `sub` and clipped at `maxv`.  With `inplace` the input is overwritten with the
+    result, which saves allocating a new activation (and, when training, keeping the input around for the backward
+    pass).  Autograd will raise an error if the input is needed for the backward pass of an earlier layer
+    """
+    def __init__(self, leak=None, sub=None, maxv=None, inplace=False):
         super().__init__()
-        self.leak, self.sub, self. maxv = leak, sub, maxv
+        self.leak, self.sub, self. maxv, self.inplace = leak, sub, maxv, inplace
         
     def forward(self, x):
+        if self.inplace:
+            if torch.is_grad_enabled() and x.requires_grad: return _GeneralReluFn.apply(x, self.leak, self.sub, self.maxv)
+            return _general_relu_(x, self.leak, self.sub, self.maxv)
         x = F.leaky_relu(x, self.leak) if self.leak is not None else F.relu(x)
         if self.sub is not None: x -= self.sub
         if self.maxv is not None: x = x.clamp_max_(self.maxv)
         return x
 
-# %% ../nbs/11_initializing.ipynb 102
+# %% ../nbs/11_initializing.ipynb 104
 def plot_func(f, start=-5, end=5, steps=100):
     x = torch.linspace(start, end, steps)
     plt.plot(x, f(x))
@@ -86,11 +123,11 @@ def plot_func(f, start=-5, end=5, steps=100):
     plt.axhline(y=0, color='k', linewidth=1.0)
     plt.axvline(x=0, color='k', linewidth=1.0)
 
-# %% ../nbs/11_initializing.ipynb 107
+# %% ../nbs/11_initializing.ipynb 109
 def init_weights(m, leaky=0.):
     if isinstance(m, (nn.Conv1d,nn.Conv2d,nn.Conv3d)): init.kaiming_normal_(m.weight, a=leaky)
 
-# %% ../nbs/11_initializing.ipynb 116
+# %% ../nbs/11_initializing.ipynb 118
 def _lsuv_stats(hook, mod, inp, outp):
     """Calculate stats for a specific module given the input and output values.  Assigns the mean and std
     as properties of the hook
@@ -117,7 +154,7 @@ def lsuv_init(m, m_in, xb):
     h.remove()
     
 
-# %% ../nbs/11_initializing.ipynb 130
+# %% ../nbs/11_initializing.ipynb 132
 def conv(ni, nf, ks=3, stride=2, act=nn.ReLU, norm=None, bias=None):
     if bias is None:
         bias = not isinstance(norm, (nn.BatchNorm1d, nn.BatchNorm2d, nn.BatchNorm3d))
@@ -126,7 +163,7 @@ def conv(ni, nf, ks=3, stride=2, act=nn.ReLU, norm=None, bias=None):
     if act: layers.append(act())
     return nn.Sequential(*layers)
 
-# %% ../nbs/11_initializing.ipynb 131
+# %% ../nbs/11_initializing.ipynb 133
 def get_model(act=nn.ReLU, nfs=None, norm=None):
     if nfs==None: nfs=[1, 8, 16, 32, 64]
     layers = [conv(nfs[o], nfs[o+1], act=act, norm=norm) for o in range(len(nfs)-1)]
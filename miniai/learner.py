@@ -1,12 +1,13 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/09_Learner.ipynb.
 
 # %% auto 0
-__all__ = ['DataLoaders', 'CancelFitException', 'CancelBatchException', 'CancelEpochException', 'run_cbs', 'Callback',
-           'SingleBatchCB', 'DeviceCB', 'to_cpu', 'MetricsCB', 'Learner', 'ProgressCB', 'TrainCB', 'with_cbs',
-           'TrainLearner', 'MomentumLearner', 'LRFinderCB', 'lr_find']
+__all__ = ['TensorDataLoader', 'DataLoaders', 'CancelFitException', 'CancelBatchException', 'CancelEpochException', 'run_cbs',
+           'Callback', 'SingleBatchCB', 'Prefetcher', 'DeviceCB', 'to_cpu', 'TimeSeries', 'save_series', 'load_series',
+           'MetricsCB', 'Learner', 'ProgressCB', 'TrainCB', 'with_cbs', 'TrainLearner', 'MomentumLearner', 'LRFinderCB',
+           'lr_find', 'ProfilerCB', 'GradAccumCB']
 
 # %% ../nbs/09_Learner.ipynb 1
-import pickle,gzip,math,os,time,shutil,torch,matplotlib as mpl,numpy as np,matplotlib.pyplot as plt
+import pickle,gzip,json,math,os,time,shutil,threading,queue,torch,matplotlib as mpl,numpy as np,matplotlib.pyplot as plt
 import fastcore.all as fc
 from collections.abc import Mapping
 from pathlib import Path
@@ -16,7 +17,7 @@ from copy import copy
 from contextlib import contextmanager
 
 from torch import tensor,nn,optim
-from torch.utils.data import DataLoader,default_collate
+from torch.utils.data import DataLoader,TensorDataset,default_collate
 import torch.nn.functional as F
 import torchvision.transforms.functional as TF
 from datasets import load_dataset,load_dataset_builder
@@ -25,8 +26,46 @@ from .datasets import *
 from .conv import *
 
 from fastprogress import progress_bar,master_bar
+from fastprogress.fastprogress import IN_NOTEBOOK
 
 # %% ../nbs/09_Learner.ipynb 10
+def _ds_tensors(ds, chunk_sz=1024):
+    """ Run the transform of a huggingface dataset once over the whole dataset, a chunk at a time, and return a
+    contiguous tensor for each feature (in the same order as `collate_dict`)
+    """
+    return tuple(torch.cat(o) for o in zip(*tensor_chunks(ds, chunk_sz)))
+
+class TensorDataLoader:
+    """ Drop in replacement for a DataLoader when the whole dataset is already in memory as tensors.  Rather than
+    fetching each sample and collating them, each batch is a slice (a view, so no copy) of the tensors or, when
+    shuffling, a single gather using one `randperm` per epoch.  Batches are tuples, eg (x, y), as for TrainCB.
+    If a `sampler` (eg a `DistributedSampler`) is given, the indices come from that instead
+    """
+    def __init__(self, *ts, batch_size=64, shuffle=False, drop_last=False, pin_memory=False, generator=None,
+                 sampler=None):
+        # pinned memory is only any use for copying to a cuda device
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        if self.pin_memory: ts = [o.pin_memory() for o in ts]
+        self.dataset = TensorDataset(*[o.contiguous() for o in ts])
+        fc.store_attr('batch_size,shuffle,drop_last,generator,sampler')
+        
+    def __len__(self):
+        n = len(self.dataset) if self.sampler is None else len(self.sampler)
+        return n//self.batch_size if self.drop_last else math.ceil(n/self.batch_size)
+    
+    def _gather(self, o, idxs):
+        # gather straight into pinned memory rather than gathering and then pinning a copy
+        out = torch.empty((len(idxs),)+o.shape[1:], dtype=o.dtype, pin_memory=True) if self.pin_memory else None
+        return torch.index_select(o, 0, idxs, out=out)
+        
+    def __iter__(self):
+        ts,bs = self.dataset.tensors,self.batch_size
+        if self.sampler is not None: idxs = torch.tensor(list(self.sampler))
+        else: idxs = torch.randperm(len(self.dataset), generator=self.generator) if self.shuffle else None
+        for i in range(0, len(self)*bs, bs):
+            if idxs is None: yield tuple(o[i:i+bs] for o in ts)
+            else: yield tuple(self._gather(o, idxs[i:i+bs]) for o in ts)
+
 class DataLoaders:
     """ Class to create train and validate dataloaders from a dataset
     """
@@ -34,10 +73,22 @@ class DataLoaders:
     def __init__(self, *dls): self.train, self.valid = dls[:2]
     
     @classmethod
-    def from_dd(cls, dd, batch_size, as_tuple=True, **kwargs):
-        """Return a tuple of dataloaders from the dd dataset
+    def from_dd(cls, dd, batch_size, as_tuple=True, materialize=False, **kwargs):
+        """Return a tuple of dataloaders from the dd dataset.  With `materialize` the transformed datasets are
+        converted to tensors once and `TensorDataLoader`s are used instead (kwargs are passed to `from_tensors`)
         """
+        if materialize: return cls.from_tensors(*[_ds_tensors(ds) for ds in dd.values()], batch_size=batch_size, **kwargs)
         return cls(*[DataLoader(ds, batch_size, collate_fn=collate_dict(ds), **kwargs) for ds in dd.values()]) 
+    
+    @classmethod
+    def from_tensors(cls, train, valid, batch_size, shuffle=True, **kwargs):
+        """Return `TensorDataLoader`s for train and valid, each of which is either a tuple of tensors, a
+        `Dataset` with `x` and `y` tensors or a dataset with `tensors` (eg `MmapDataset`).  Only the training set
+        is shuffled
+        """
+        def _ts(o): return o.tensors if hasattr(o, 'tensors') else (o.x,o.y) if fc.hasattrs(o, ('x','y')) else o
+        return cls(TensorDataLoader(*_ts(train), batch_size=batch_size, shuffle=shuffle, **kwargs),
+                   TensorDataLoader(*_ts(valid), batch_size=batch_size, **kwargs))
 
 # %% ../nbs/09_Learner.ipynb 17
 class CancelFitException(Exception): pass
@@ -52,6 +103,23 @@ def run_cbs(cbs, method_nm, learn=None):
         # if the callback is not None then execute it
         if method is not None: method(learn)
 
+class _CbTable(dict):
+    """ Dispatch table used by the Learner in place of `run_cbs`.  Maps each event name to a tuple of the bound
+    callback methods that handle it, already sorted by `order`.  An entry is built the first time an event
+    fires, so after that an event costs a single dict lookup and an event with no handlers loops over nothing
+    """
+    def __init__(self, cbs):
+        super().__init__()
+        self.cbs = sorted(cbs, key=attrgetter('order'))
+        # the table holds a reference to each callback so the ids can't be reused while it is alive
+        self.ids = [id(cb) for cb in cbs]
+        
+    def matches(self, cbs): return self.ids == [id(cb) for cb in cbs]
+    
+    def __missing__(self, method_nm):
+        methods = self[method_nm] = tuple(m for m in (getattr(cb, method_nm, None) for cb in self.cbs) if m is not None)
+        return methods
+
 # %% ../nbs/09_Learner.ipynb 20
 class Callback(): order = 0
 
@@ -61,36 +129,228 @@ class SingleBatchCB(Callback):
     def after_batch(self, learn): raise CancelFitException()
 
 # %% ../nbs/09_Learner.ipynb 37
+def _record_stream(x, stream):
+    # tell the cuda caching allocator that tensors copied on the prefetch stream are used on `stream`
+    if isinstance(x, torch.Tensor): x.record_stream(stream)
+    elif isinstance(x, Mapping): [_record_stream(o, stream) for o in x.values()]
+    else: [_record_stream(o, stream) for o in x]
+
+class Prefetcher:
+    """ Wrap a dataloader so that batches are loaded, collated and moved to `device` on a background thread,
+    keeping up to `n` batches ready in a queue.  On cuda the batches are pinned and copied with non blocking copies
+    on a separate stream, so the copy overlaps with the model.  `wait` is the total time spent waiting for data.
+    kwargs are passed to `to_device`
+    """
+    def __init__(self, dl, device=def_device, n=2, **kwargs):
+        self.dl,self.device,self.n,self.kwargs = dl,torch.device(device),n,kwargs
+        self.cuda = self.device.type=='cuda'
+        self.thread,self.wait = None,0.
+        
+    def __len__(self): return len(self.dl)
+    
+    def _load(self, q, stop):
+        stream = torch.cuda.Stream(self.device) if self.cuda else None
+        try:
+            for b in self.dl:
+                if self.cuda:
+                    with torch.cuda.stream(stream): b = to_device(b, self.device, non_blocking=True, pin_memory=True, **self.kwargs)
+                    ev = torch.cuda.Event()
+                    ev.record(stream)
+                else: b,ev = to_device(b, self.device, **self.kwargs),None
+                # don't block forever on a full queue in case the consumer has gone away
+                while not stop.is_set():
+                    try: q.put((b,ev), timeout=0.1); break
+                    except queue.Full: pass
+                if stop.is_set(): return
+            q.put(None)
+        except Exception as e: q.put(e)
+        
+    def __iter__(self):
+        self.close()
+        q,self.stop = queue.Queue(maxsize=self.n),threading.Event()
+        self.thread = threading.Thread(target=self._load, args=(q, self.stop), daemon=True)
+        self.thread.start()
+        self.q,self.wait = q,0.
+        try:
+            while True:
+                start = time.perf_counter()
+                res = q.get()
+                self.wait += time.perf_counter()-start
+                if res is None: return
+                if isinstance(res, Exception): raise res
+                b,ev = res
+                if ev is not None:
+                    ev.wait()
+                    _record_stream(b, torch.cuda.current_stream(self.device))
+                yield b
+        finally: self.close()
+    
+    def close(self):
+        "Stop the background thread, eg when an epoch is cancelled"
+        if self.thread is None: return
+        self.stop.set()
+        # empty the queue so that the thread isn't left blocked on it
+        while self.thread.is_alive():
+            try: self.q.get(timeout=0.1)
+            except queue.Empty: pass
+        self.thread.join()
+        self.thread = None
+
 class DeviceCB(Callback):
-    def __init__(self, device=def_device): fc.store_attr()
+    """ Move the model and each batch to `device`.  If `prefetch` is set then up to that many batches are loaded and
+    moved to the device in the background by a `Prefetcher`, and the time spent waiting for data each epoch is
+    recorded in `self.waits` as (epoch, training, wait seconds, epoch seconds).  kwargs (eg `non_blocking`, `dtype`
+    or `memory_format`) are passed to `to_device`.  If `memory_format` is given the model is also converted to it, so
+    eg `DeviceCB(memory_format=torch.channels_last)` runs a conv model in channels last throughout
+    """
+    def __init__(self, device=def_device, prefetch=0, **kwargs):
+        fc.store_attr('device,prefetch')
+        self.kwargs = kwargs
     def before_fit(self, learn):
-        if hasattr(learn.model, 'to'): learn.model.to(self.device)
+        if hasattr(learn.model, 'to'):
+            mf = self.kwargs.get('memory_format')
+            learn.model.to(self.device, **({} if mf is None else dict(memory_format=mf)))
+        self.waits = []
+    def before_epoch(self, learn):
+        if not self.prefetch: return
+        self.start = time.perf_counter()
+        learn.dl = self.pf = Prefetcher(learn.dl, self.device, self.prefetch, **self.kwargs)
     def before_batch(self, learn):
-        learn.batch = to_device(learn.batch, device=self.device)
+        if not self.prefetch: learn.batch = to_device(learn.batch, device=self.device, **self.kwargs)
+    def cleanup_epoch(self, learn):
+        if not self.prefetch: return
+        self.pf.close()
+        self.waits.append((learn.epoch, learn.training, self.pf.wait, time.perf_counter()-self.start))
 
 # %% ../nbs/09_Learner.ipynb 40
 from torcheval.metrics import MulticlassAccuracy, Mean
 
 # %% ../nbs/09_Learner.ipynb 45
 def to_cpu(x):
-    """recursive function that breaks lists and tuples into individual items moves them to the cpu
-    and then returns the original item with all of the parts moved
+    """Move a batch (tensors nested in dicts, lists, tuples etc) to the cpu, detached from the graph.  This uses
+    `to_device`, so the structure of the batch is only worked out once
     """
-    if isinstance(x, Mapping): return {k: to_cpu(v) for k, v in x.items()}
-    if isinstance(x, list): return [to_cpu(v) for v in x]
-    if isinstance(x, tuple): return tuple(to_cpu(list(x)))
-    return x.detach().cpu()
+    return to_device(x, 'cpu', detach=True)
+
+class TimeSeries:
+    """ A fixed size record of a series of values (eg the loss of every batch) in a numpy array.  When it fills up
+    neighbouring pairs of entries are merged, keeping their min, mean and max, so each entry then covers twice as
+    many steps.  Tensors that are appended are only copied to the cpu `flush_every` at a time (or when the series is
+    read), so appending doesn't wait for the device
+    """
+    def __init__(self, cap=4096, flush_every=256):
+        assert cap%2==0, 'cap must be even'
+        fc.store_attr()
+        self.data = np.zeros((cap, 3))  # min, mean, max of each entry
+        self.n,self.width,self.count,self.pending = 0,1,0,[]
+        self._reset()
+
+    def _reset(self): self.cur = [0, math.inf, 0., -math.inf]  # count, min, sum, max of the partly filled entry
+
+    def append(self, v):
+        if isinstance(v, torch.Tensor):
+            self.pending.append(v.detach())
+            if len(self.pending)>=self.flush_every: self.flush()
+        else:
+            self.flush()
+            self._add(float(v))
+
+    def flush(self):
+        """ Add the pending tensors to the series (one copy from the device), returning their values """
+        if not self.pending: return np.zeros(0)
+        vals = torch.stack([o.reshape(()) for o in self.pending]).float().cpu().numpy()
+        self.pending = []
+        for v in vals.tolist(): self._add(v)
+        return vals
+
+    def _add(self, v):
+        c = self.cur
+        c[0],c[1],c[2],c[3] = c[0]+1,min(c[1], v),c[2]+v,max(c[3], v)
+        self.count += 1
+        if c[0]<self.width: return
+        self.data[self.n] = c[1],c[2]/c[0],c[3]
+        self.n += 1
+        self._reset()
+        if self.n==self.cap:
+            d = self.data.reshape(self.cap//2, 2, 3)
+            self.data[:self.cap//2] = np.stack([d[:,:,0].min(1), d[:,:,1].mean(1), d[:,:,2].max(1)], 1)
+            self.n,self.width = self.cap//2,self.width*2
+
+    def _col(self, i, f):
+        self.flush()
+        res = self.data[:self.n,i]
+        return np.append(res, f(self.cur)) if self.cur[0] else res.copy()
+
+    @property
+    def min(self): return self._col(0, lambda c: c[1])
+    @property
+    def mean(self): return self._col(1, lambda c: c[2]/c[0])
+    @property
+    def max(self): return self._col(2, lambda c: c[3])
+    @property
+    def steps(self):
+        """ The step (ie the number of values appended before it) at the start of each entry """
+        # flush first, which can merge entries and so change `width`
+        self.flush()
+        return np.arange(len(self))*self.width
+    @property
+    def n_steps(self):
+        """ The number of values appended, including the pending ones """
+        return self.count + len(self.pending)
+
+    def __len__(self):
+        """ The number of entries there will be once the pending values are added.  This is worked out without
+        flushing them, so it doesn't wait for the device
+        """
+        n,w,c = self.n,self.width,self.cur[0]+len(self.pending)
+        while True:
+            k = min(c//w, self.cap-n)
+            n,c = n+k,c-k*w
+            if n<self.cap: return n + (c>0)
+            n,w = self.cap//2,w*2
+    def __array__(self, dtype=None, copy=None): return self.mean if dtype is None else self.mean.astype(dtype)
+
+    def state(self):
+        self.flush()
+        return dict(data=self.data[:self.n], cur=np.array(self.cur), meta=np.array([self.cap, self.width, self.count]))
+
+    @classmethod
+    def from_state(cls, data, cur, meta):
+        res = cls(int(meta[0]))
+        res.n,res.width,res.count = len(data),int(meta[1]),int(meta[2])
+        res.data[:res.n],res.cur = data,cur.tolist()
+        return res
+
+def save_series(path, **series):
+    """ Save some named `TimeSeries` to one .npz file """
+    np.savez(path, **{f'{k}/{n}':v for k,s in series.items() for n,v in s.state().items()})
+
+def load_series(path):
+    with np.load(path) as f: arrs = dict(f)
+    names = dict.fromkeys(o.split('/')[0] for o in arrs)
+    return {k: TimeSeries.from_state(*(arrs[f'{k}/{n}'] for n in ('data','cur','meta'))) for k in names}
 
 # %% ../nbs/09_Learner.ipynb 46
 class MetricsCB(Callback):
-    def __init__(self, *ms, **metrics):
+    """ Calculate torcheval metrics and the mean loss over each epoch.
+    
+    By default the batch, predictions and loss are moved to the cpu every batch before the metrics are updated.
+    With `lazy=True` the metrics are moved to, and updated on, whatever device the predictions are on, so nothing
+    is copied to the host and no device sync is forced during the epoch.  The values are only pulled back when
+    they are computed in `after_epoch`, or every `sync_every` batches (if set).  The latest values are stored in
+    `self.values` as floats.  Each metric is computed by `_compute`, which `DDPCB` replaces to combine the metrics
+    from all the processes
+    """
+    def __init__(self, *ms, lazy=False, sync_every=None, **metrics):
         # Assign all metrics supplied as list items to attributes
         for o in ms:
             # Create a metrics dictionary to facilitate easy access
-            metrics[type(o).__name__()] = o
+            metrics[type(o).__name__] = o
         self.metrics = metrics
         self.all_metrics = copy(metrics)
         self.all_metrics['loss'] = self.loss = Mean()
+        self.lazy,self.sync_every = lazy,sync_every
+        self.values = {}
 
     def _log(self, 
              d # list of metrics to print for each epoch
@@ -106,25 +366,38 @@ class MetricsCB(Callback):
     def before_epoch(self, learn):
         # Reset metrics
         [o.reset() for o in self.all_metrics.values()]
+        self.values = {}
         
     def after_epoch(self, learn):
         # Print summary of metrics
-        log = {k: f'{v.compute():.3f}' for k, v in self.all_metrics.items()}
+        self.values = {k: self._compute(v).item() for k, v in self.all_metrics.items()}
+        log = {k: f'{v:.3f}' for k, v in self.values.items()}
         log['epoch'] = learn.epoch
         log['train'] = 'train' if learn.model.training else 'eval'
         # Trigger printing of the metrics
         self._log(log)
         
+    def _compute(self, m): return m.compute()
+        
+    def _to(self, device):
+        # torcheval metrics keep their state on the device they were last moved to, and reset() keeps it there
+        for m in self.all_metrics.values(): m.to(device)
+        
     def after_batch(self, learn):
-        # Update metrics
-        # put x, and y onto cpu
-        x, y, *_  = to_cpu(learn.batch)
-        # put preds onto cpu and calculate metric for each metric
+        # Update metrics.  x is only needed for its length so it is never copied
+        x, y, *_ = learn.batch
+        preds, loss = learn.preds.detach(), learn.loss.detach()
+        if self.lazy:
+            if self.loss.device != preds.device: self._to(preds.device)
+        # put y, preds and loss onto cpu
+        else: y, preds, loss = to_cpu(y), to_cpu(preds), to_cpu(loss)
         for m in self.metrics.values():
-            m.update(to_cpu(learn.preds), y)
+            m.update(preds, y)
         # update the loss (Note that loss has been instantiated from the Mean class where the weight is used)
-        self.loss.update(to_cpu(learn.loss), weight=len(x))
-        
+        # in lazy mode this is a running sum on the device
+        self.loss.update(loss, weight=len(x))
+        if self.sync_every and (learn.iter+1)%self.sync_every==0:
+            self.values = {k: self._compute(v).item() for k, v in self.all_metrics.items()}
 
 # %% ../nbs/09_Learner.ipynb 50
 class Learner():
@@ -191,6 +464,18 @@ class Learner():
     
 
 # %% ../nbs/09_Learner.ipynb 52
+def _batch_len(b):
+    """ Number of items in a batch, taken from its first element """
+    if isinstance(b, Mapping): b = next(iter(b.values()))
+    elif isinstance(b, (list,tuple)): b = b[0]
+    return len(b)
+
+def _split_batch(b, sz):
+    """ Split a batch (tensors nested in dicts, lists and tuples) into batches of at most `sz` items """
+    if isinstance(b, Mapping): return [dict(zip(b, o)) for o in zip(*(_split_batch(v, sz) for v in b.values()))]
+    if isinstance(b, (list,tuple)): return [type(b)(o) if isinstance(b, list) else tuple(o) for o in zip(*(_split_batch(v, sz) for v in b))]
+    return b.split(sz)
+
 class ProgressCB(Callback):
     """ Need to make sure that this callback is higher in the order than the metrics callback so that results 
     are updated.
@@ -198,20 +483,25 @@ class ProgressCB(Callback):
     The progress callbar will both plot a bar of the progress through the epochs and also a sub bar of 
     progress through the batches of an epoch
     
-    It also outputs a summary of loss and updates the plot after each batch
+    It also outputs a summary of loss and updates the plot, at most every `secs` seconds (or every `every` batches
+    if set).  The loss is summed on the device in between so it's only read back when it's shown.
     
+    When `headless` (by default when not in a notebook) there are no bars or plots, instead a line with the loss,
+    samples/sec and the % of time spent waiting for data is printed every `log_secs` seconds
     """
     order = MetricsCB.order + 1
     
-    def __init__(self, plot=False): self.plot=plot
+    def __init__(self, plot=False, secs=0.5, every=None, headless=None, log_secs=5.): fc.store_attr()
         
     def before_fit(self, learn):
+        self.quiet = not IN_NOTEBOOK if self.headless is None else self.headless
+        self.losses = TimeSeries(cap=1024)
+        if self.quiet: return
         # Replace epochs with the master bar to enable plotting progress
         learn.epochs = self.mbar = master_bar(learn.epochs)
         # Replace teh learner metrics log with the log from this class
         self.first = True
         if hasattr(learn, 'metrics'): learn.metrics._log = self._log
-        self.losses = []
         
     def _log(self, d):
         """ Write the metrics and loss to the output
@@ -219,20 +509,53 @@ class ProgressCB(Callback):
         if self.first:
             self.mbar.write(list(d), table=True)
             self.first=False
-        self.mbar.write(list(d.values()), table=True)
+        self.mbar.write([str(o) for o in d.values()], table=True)
     
     def before_epoch(self, learn):
         """ Setup the second progress bar for the batches
         """
-        learn.dl = progress_bar(learn.dl, leave=False, parent=self.mbar)
+        self.loss_sum,self.loss_n,self.n_samp,self.wait = 0.,0,0,0.
+        self.last = self.t_end = time.perf_counter()
+        if not self.quiet: learn.dl = progress_bar(learn.dl, leave=False, parent=self.mbar)
+
+    def before_batch(self, learn): self.wait += time.perf_counter()-self.t_end
     
     def after_batch(self, learn):
-        learn.dl.comment = f"{learn.loss:.3f}"
-        if self.plot and hasattr(learn, 'metrics') and learn.training:
-            self.losses.append(learn.loss.item())
-            # when a collection or list is passed to fc.L.range it returns a range that is based upon the 
-            # length of the collection
-            self.mbar.update_graph([[fc.L.range(self.losses), self.losses]])
+        loss = learn.loss.detach()
+        # a running sum on the device, so no sync
+        self.loss_sum,self.loss_n = self.loss_sum+loss,self.loss_n+1
+        self.n_samp += _batch_len(learn.batch)
+        if self.plot and hasattr(learn, 'metrics') and learn.training: self.losses.append(loss)
+        now = time.perf_counter()
+        if self.quiet:
+            if now-self.last>=self.log_secs: self._log_speed(learn, now)
+        elif now-self.last>=self.secs or (self.every and (learn.iter+1)%self.every==0): self._redraw(learn, now)
+        self.t_end = time.perf_counter()
+
+    def _loss(self):
+        res = (self.loss_sum/self.loss_n).item()
+        self.loss_sum,self.loss_n = 0.,0
+        return res
+
+    def _redraw(self, learn, now):
+        learn.dl.comment = f"{self._loss():.3f}"
+        # the losses are downsampled once there are lots of them, so plot them against their steps
+        if self.plot and len(self.losses):
+            # read the means first (which flushes the losses), so the steps are for the same entries
+            mean = self.losses.mean
+            self.mbar.update_graph([[np.arange(len(mean))*self.losses.width, mean]])
+        self.last = now
+
+    def _log_speed(self, learn, now):
+        dt = now-self.last
+        n = len(learn.dl) if hasattr(learn.dl, '__len__') else '?'
+        print(f"epoch {learn.epoch} {'train' if learn.training else 'eval'} {learn.iter+1}/{n}: loss {self._loss():.3f}, "
+              f"{self.n_samp/dt:.0f} samples/s, {100*self.wait/dt:.0f}% waiting for data")
+        self.n_samp,self.wait,self.last = 0,0.,now
+
+    def after_epoch(self, learn):
+        # make sure the end of the epoch is shown
+        if not self.quiet and self.loss_n: self._redraw(learn, time.perf_counter())
 
 # %% ../nbs/09_Learner.ipynb 53
 class TrainCB(Callback):
@@ -263,22 +586,51 @@ class Learner():
         cbs = fc.L(cbs)
         fc.store_attr()
         
+    # set (eg by `GradAccumCB`) to forward and backward training batches in slices of at most this many items
+    micro_bs = None
+    # the number of the first batch of the epoch, if `CheckpointCB` is resuming part way through it
+    start_iter = 0
+
     @with_cbs('batch')
     def _one_batch(self):
-        self.predict()
-        self.callback('after_predict')
-        self.get_loss()
-        self.callback('after_loss')
+        if self.training and self.micro_bs and _batch_len(self.batch)>self.micro_bs: self._micro_batches()
+        else:
+            self.predict()
+            self.callback('after_predict')
+            self.get_loss()
+            self.callback('after_loss')
+            if self.training:
+                self.backward()
+                self.callback('after_backward')
         if self.training:
-            self.backward()
-            self.callback('after_backward')
             self.step()
             self.callback('after_step')
             self.zero_grad()
+
+    def _micro_batches(self):
+        """ Forward and backward each slice of the batch in turn, accumulating the gradients.  Each loss is weighted
+        by its share of the batch, so the gradients are those of the whole batch.  `before_micro_batch`,
+        `after_predict`, `after_loss` and `after_backward` fire for each slice (so eg a change to the loss in
+        `after_loss` is what gets backpropagated), and the later callbacks then see the whole batch, with all of
+        the predictions and the total loss
+        """
+        batch,n,preds,loss = self.batch,_batch_len(self.batch),[],0.
+        for self.batch in _split_batch(batch, self.micro_bs):
+            self.callback('before_micro_batch')
+            self.predict()
+            self.callback('after_predict')
+            self.get_loss()
+            self.callback('after_loss')
+            self.loss = self.loss*(_batch_len(self.batch)/n)
+            self.backward()
+            self.callback('after_backward')
+            preds.append(self.preds.detach())
+            loss = loss+self.loss.detach()
+        self.batch,self.preds,self.loss = batch,torch.cat(preds),loss
             
     @with_cbs('epoch')
     def _one_epoch(self):
-        for self.iter, self.batch in enumerate(self.dl): self._one_batch()
+        for self.iter, self.batch in enumerate(self.dl, self.start_iter): self._one_batch()
         
     def one_epoch(self, training):
         self.model.train(training)
@@ -291,10 +643,17 @@ class Learner():
             if train: self.one_epoch(True)
             if valid: torch.no_grad()(self.one_epoch)(False)
     
-    def fit(self, n_epochs=1, train=True, valid=True, cbs=None, lr=None):
+    def fit(self, n_epochs=1, train=True, valid=True, cbs=None, lr=None, resume_from=None):
+        """ Fit for `n_epochs`, adding `cbs` for just this fit.  `resume_from` is a checkpoint saved by `CheckpointCB`
+        (which has to be one of the callbacks) to carry on from
+        """
         cbs = fc.L(cbs)
+        self.resume_from = resume_from
         for cb in cbs: self.cbs.append(cb)
         try:
+            if resume_from is not None and not any(getattr(cb, 'can_resume', False) for cb in self.cbs):
+                raise ValueError('resume_from needs a CheckpointCB in the callbacks to load the checkpoint')
+            self._update_cbt()
             self.n_epochs=n_epochs
             self.epochs = range(n_epochs)
             if lr is None: lr=self.lr
@@ -302,12 +661,23 @@ class Learner():
             self._fit(train, valid)
         finally:
             for cb in cbs: self.cbs.remove(cb)
+            if cbs: self._update_cbt()
     
     def __getattr__(self, name):
         if name in ('predict','get_loss','backward','step','zero_grad'): return partial(self.callback, name)
         raise AttributeError(name)
         
-    def callback(self, method_nm): run_cbs(self.cbs, method_nm, self)
+    _cbt = None
+    def _update_cbt(self):
+        """ Rebuild the callback dispatch table, but only if `self.cbs` has changed since it was last built
+        """
+        if self._cbt is None or not self._cbt.matches(self.cbs): self._cbt = _CbTable(self.cbs)
+        return self._cbt
+    
+    def callback(self, method_nm):
+        # `fit` keeps the table up to date, so only build it here if we are called before the first fit
+        cbt = self._cbt if self._cbt is not None else self._update_cbt()
+        for method in cbt[method_nm]: method(self)
     
     @property
     def training(self): return self.model.training
@@ -329,20 +699,22 @@ class MomentumLearner(TrainLearner):
         super().__init__(model, dls, loss_func, lr, cbs, opt_func)
 
     def zero_grad(self):
-        with torch.no_grad():
-            for p in self.model.parameters(): p.grad *= self.mom
+        # a single multi-tensor op, rather than a python loop over the parameters
+        with torch.no_grad(): torch._foreach_mul_([p.grad for p in self.model.parameters() if p.grad is not None], self.mom)
 
 # %% ../nbs/09_Learner.ipynb 76
 from torch.optim.lr_scheduler import ExponentialLR
 
 # %% ../nbs/09_Learner.ipynb 77
 class LRFinderCB(Callback):
-    def __init__(self, gamma=1.3, max_mult=3): fc.store_attr()
+    """ The losses are only read back from the device (to check for the loss blowing up) every `check_every` batches
+    """
+    def __init__(self, gamma=1.3, max_mult=3, check_every=8): fc.store_attr()
     
     def before_fit(self, learn):
-        self.losses, self.lrs = [], []
+        self.losses, self.lrs = TimeSeries(flush_every=math.inf), TimeSeries()
         self.sched = ExponentialLR(learn.opt, gamma=self.gamma)
-        self.min = math.inf
+        self.min,self.i = math.inf,0
         
     def after_batch(self, learn):
         # add lr and loss to lists
@@ -351,15 +723,20 @@ class LRFinderCB(Callback):
         # update lr, 
         if not learn.model.training: raise CancelEpochException()
         self.lrs.append(learn.opt.param_groups[0]['lr'])
-        loss = to_cpu(learn.loss)
-        self.losses.append(loss)
-        if loss < self.min: self.min=loss
-        # test of starting to become unstable
-        if loss > self.min * self.max_mult: raise CancelFitException()
+        self.losses.append(learn.loss)
+        self.i += 1
+        if self.i%self.check_every==0: self._check()
         # update the learning rates in the param_groups
         self.sched.step()
+
+    def _check(self):
+        for loss in self.losses.flush():
+            if loss < self.min: self.min=loss
+            # test of starting to become unstable
+            if loss > self.min * self.max_mult: raise CancelFitException()
         
     def cleanup_fit(self, learn):
+        self.losses.flush()
         plt.plot(self.lrs, self.losses)
         plt.xscale('log')
 
@@ -367,3 +744,123 @@ class LRFinderCB(Callback):
 @fc.patch
 def lr_find(self:Learner, gamma=1.3, max_mult=3, start_lr=1e-5, max_epochs=10):
     self.fit(max_epochs, lr=start_lr, cbs=LRFinderCB(gamma=gamma, max_mult=max_mult))
+
+# %% ../nbs/09_Learner.ipynb 106
+class ProfilerCB(Callback):
+    """ Time the data loading, forward, loss, backward, optimizer step (and zero_grad) and callbacks of each batch.
+    With `sync` cuda is synchronised at each event so the gpu time ends up in the right phase.  The first `n_trace`
+    batches are kept for `export_trace` (Chrome's trace format, as is `trace_path` written after fitting).
+    `torch_window=(start,n)` runs `torch.profiler` over n batches from batch `start`, saving its trace to
+    `torch_trace`
+    """
+    # the phase that ends when each event fires
+    gaps = dict(before_epoch=None, before_batch='data', after_predict='forward', after_loss='loss',
+                after_backward='backward', after_step='step', after_batch='zero_grad', cleanup_batch=None)
+    phases = ('data','forward','loss','backward','step','zero_grad','callbacks')
+
+    def __init__(self, enabled=True, sync=True, n_trace=200, trace_path=None, torch_window=None,
+                 torch_trace='torch_trace.json'): fc.store_attr()
+
+    def before_fit(self, learn):
+        if not self.enabled: return
+        self.learn,self.cb = learn,learn.callback
+        self.totals = {True: dict.fromkeys(self.phases, 0.), False: dict.fromkeys(self.phases, 0.)}
+        self.counts = {True: 0, False: 0}
+        self.events,self.n,self.prof = [],0,None
+        self.sync_cuda = self.sync and torch.cuda.is_available()
+        self.t0 = self.t_last = self._now()
+        learn.callback = self._callback
+
+    def _now(self):
+        if self.sync_cuda: torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def _add(self, nm, start, dur, cat):
+        self.totals[self.learn.training][nm] += dur
+        if self.n<=self.n_trace: self.events.append((nm, cat, start, dur))
+
+    def _callback(self, method_nm):
+        if method_nm not in self.gaps: return self.cb(method_nm)
+        t0 = self._now()
+        training = self.learn.training
+        if method_nm=='before_batch':
+            self.n += 1
+            self.counts[training] += 1
+            if self.torch_window and self.n==self.torch_window[0]+1: self._start_torch()
+        gap = self.gaps[method_nm]
+        if gap and (training or gap in ('data','forward','loss')): self._add(gap, self.t_last, t0-self.t_last, 'phase')
+        try: self.cb(method_nm)
+        finally:
+            self.t_last = t1 = self._now()
+            if method_nm!='before_epoch': self._add('callbacks', t0, t1-t0, method_nm)
+            if method_nm=='cleanup_batch' and self.prof and self.n==sum(self.torch_window): self._stop_torch()
+
+    def _start_torch(self):
+        acts = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available(): acts.append(torch.profiler.ProfilerActivity.CUDA)
+        self.prof = torch.profiler.profile(activities=acts)
+        self.prof.__enter__()
+
+    def _stop_torch(self):
+        self.prof.__exit__(None, None, None)
+        self.prof.export_chrome_trace(str(self.torch_trace))
+        self.prof = None
+
+    def cleanup_fit(self, learn):
+        if not self.enabled: return
+        if self.prof: self._stop_torch()
+        del learn.callback
+        if self.trace_path: self.export_trace(self.trace_path)
+
+    def export_trace(self, path):
+        """ Save the timings of the first `n_trace` batches as a Chrome trace (load it in chrome://tracing or perfetto) """
+        evs = [dict(name=nm, cat=cat, ph='X', ts=(start-self.t0)*1e6, dur=dur*1e6, pid=0, tid=0)
+               for nm,cat,start,dur in self.events]
+        Path(path).write_text(json.dumps(dict(traceEvents=evs)))
+
+    def summary(self, train=True):
+        """ Print the total and per batch time of each phase for the training (or validation) batches """
+        tots,n = self.totals[train],max(self.counts[train], 1)
+        total = sum(tots.values())
+        print(f"{'phase':10s} {'total s':>9s} {'ms/batch':>9s} {'%':>6s}")
+        for k,v in tots.items():
+            if v: print(f'{k:10s} {v:9.3f} {1000*v/n:9.3f} {100*v/total:6.1f}')
+        print(f"{'total':10s} {total:9.3f} {1000*total/n:9.3f}")
+
+# %% ../nbs/09_Learner.ipynb 112
+def _cat_batches(bs):
+    b = bs[0]
+    if isinstance(b, Mapping): return {k: _cat_batches([o[k] for o in bs]) for k in b}
+    if isinstance(b, (list,tuple)): return type(b)(_cat_batches(o) for o in zip(*bs)) if isinstance(b, list) else tuple(_cat_batches(o) for o in zip(*bs))
+    return torch.cat(bs)
+
+class _Grouped:
+    """ Iterate through `dl` concatenating each `k` batches into one """
+    def __init__(self, dl, k): self.dl,self.k,self.bs = dl,k,None
+    def __len__(self): return math.ceil(len(self.dl)/self.k)
+    def __iter__(self):
+        bs = []
+        for b in self.dl:
+            if self.bs is None: self.bs = _batch_len(b)
+            bs.append(b)
+            if len(bs)==self.k:
+                yield _cat_batches(bs)
+                bs = []
+        if bs: yield _cat_batches(bs)
+
+class GradAccumCB(Callback):
+    """ One optimizer step for every `accum` training batches, with the forward and backward passes done in
+    micro-batches of at most `micro_bs` (by default the dataloader's batch size)
+    """
+    order = DeviceCB.order-1
+    def __init__(self, accum=1, micro_bs=None): fc.store_attr()
+
+    def before_fit(self, learn): learn.micro_bs = self.micro_bs
+
+    def before_epoch(self, learn):
+        if learn.training and self.accum>1: learn.dl = self.dl = _Grouped(learn.dl, self.accum)
+
+    def before_batch(self, learn):
+        if learn.training and self.accum>1 and self.micro_bs is None: learn.micro_bs = self.dl.bs
+
+    def cleanup_fit(self, learn): learn.micro_bs = None
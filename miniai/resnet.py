@@ -1,7 +1,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/13_resnet.ipynb.
 
 # %% auto 0
-__all__ = ['act_gr', 'ResBlock']
+__all__ = ['act_gr', 'ResBlock', 'fuse_model', 'memory_format_report']
 
 # %% ../nbs/13_resnet.ipynb 2
 import pickle,gzip,math,os,time,shutil,torch,matplotlib as mpl,numpy as np,matplotlib.pyplot as plt
@@ -59,3 +59,40 @@ class ResBlock(nn.Module):
     def forward(self, x):
         return self.act(self.convs(x) + self.idconv(self.pool(x)))
     
+
+# %% ../nbs/13_resnet.ipynb 39
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+from copy import deepcopy
+
+def fuse_model(model):
+    """ Return a copy of `model` for inference, with every BatchNorm2d that follows a Conv2d in an `nn.Sequential` (as
+    in `conv` and so `ResBlock`) folded into the conv's weights and bias, and replaced with an `nn.Identity` (so the
+    names in the state dict don't move).  The `GeneralRelu`s are also made in-place
+    """
+    model = deepcopy(model).eval()
+    for m in list(model.modules()):
+        if isinstance(m, GeneralRelu): m.inplace = True
+        if not isinstance(m, nn.Sequential): continue
+        for i in range(len(m)-1):
+            c,bn = m[i],m[i+1]
+            if isinstance(c, nn.Conv2d) and isinstance(bn, nn.BatchNorm2d) and bn.running_mean is not None:
+                m[i],m[i+1] = fuse_conv_bn_eval(c, bn),nn.Identity()
+    return model
+
+# %% ../nbs/13_resnet.ipynb 46
+def memory_format_report(model, x, memory_format=torch.channels_last):
+    """ Run `x` (converted to `memory_format`) through `model` (also converted) and return a list of the modules
+    whose 4d output isn't in `memory_format`, and any `nn.Flatten` that had to copy its input rather than return a
+    view of it, as (module name, output shape, output strides).  The check is run on a copy of `model`, so the model
+    itself isn't converted (and its batchnorm statistics aren't updated)
+    """
+    model,x = deepcopy(model).to(memory_format=memory_format),x.to(memory_format=memory_format)
+    names = {m:n for n,m in model.named_modules()}
+    res = []
+    def _f(hook, mod, inp, outp):
+        if not isinstance(outp, torch.Tensor): return
+        copied = isinstance(mod, nn.Flatten) and outp.data_ptr()!=inp[0].data_ptr()
+        if copied or (outp.dim()==4 and not outp.is_contiguous(memory_format=memory_format)):
+            res.append((names[mod], tuple(outp.shape), outp.stride()))
+    with Hooks(model, _f), torch.no_grad(): model(x)
+    return res
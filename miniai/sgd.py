@@ -1,7 +1,9 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/12_accel_sgd.ipynb.
 
 # %% auto 0
-__all__ = ['BaseSchedCB', 'BatchSchedCB', 'HasLearnCB', 'RecorderCB', 'EpochSchedCB']
+__all__ = ['sched_lin', 'sched_cos', 'sched_exp', 'sched_const', 'combine_scheds', 'one_cycle', 'one_cycle_mom', 'warmup_decay',
+           'PrecomputedSched', 'BaseSchedCB', 'BatchSchedCB', 'HasLearnCB', 'RecorderCB', 'EpochSchedCB',
+           'CheckpointCB', 'FlatOptimizer', 'FlatSGD', 'FlatAdam']
 
 # %% ../nbs/12_accel_sgd.ipynb 2
 import pickle,gzip,math,os,time,shutil,torch,matplotlib as mpl,numpy as np,matplotlib.pyplot as plt
@@ -28,6 +30,88 @@ from .activations import *
 from .init import *
 
 # %% ../nbs/12_accel_sgd.ipynb 48
+def sched_lin(start, end): return lambda pos: start + pos*(end-start)
+def sched_cos(start, end): return lambda pos: start + (1-torch.cos(math.pi*pos))*(end-start)/2
+def sched_exp(start, end): return lambda pos: start * (end/start)**pos
+def sched_const(val): return lambda pos: torch.full_like(pos, val)
+
+def combine_scheds(pcts, scheds):
+    """ A schedule which runs each of `scheds` in turn, for `pcts` of the steps (which should add up to 1).  Each
+    schedule gets positions going from 0 to 1 over its part of the steps
+    """
+    assert abs(sum(pcts)-1)<1e-6, f'pcts should add up to 1, not {sum(pcts)}'
+    edges = torch.tensor([0.]+list(pcts), dtype=torch.float64).cumsum(0)
+    edges[-1] = 1.  # so rounding in the sum can't leave the last positions out
+    def _f(pos):
+        res = torch.zeros_like(pos)
+        for lo,hi,s in zip(edges[:-1].tolist(), edges[1:].tolist(), scheds):
+            m = (pos>=lo) & (pos<hi)
+            res[m] = s((pos[m]-lo)/(hi-lo))
+        return res
+    return _f
+
+def one_cycle(lr_max, pct_start=0.25, div=25., div_final=1e5):
+    "The 1cycle learning rate: cosine warm-up from `lr_max/div` to `lr_max`, then cosine annealing to `lr_max/div_final`"
+    return combine_scheds([pct_start, 1-pct_start], [sched_cos(lr_max/div, lr_max), sched_cos(lr_max, lr_max/div_final)])
+
+def one_cycle_mom(moms=(0.95,0.85,0.95), pct_start=0.25):
+    "The momentum to go with `one_cycle`: down while the learning rate goes up, and back up as it comes down"
+    return combine_scheds([pct_start, 1-pct_start], [sched_cos(*moms[:2]), sched_cos(*moms[1:])])
+
+def warmup_decay(lr_max, pct_warmup=0.1, decay=sched_cos, lr_end=0.):
+    "Linear warm-up from 0 to `lr_max`, then `decay` to `lr_end`"
+    return combine_scheds([pct_warmup, 1-pct_warmup], [sched_lin(0., lr_max), decay(lr_max, lr_end)])
+
+class PrecomputedSched:
+    """ A scheduler which works out the value of each hyper-parameter in `scheds` (a function of the position in
+    training from 0 to 1, such as `one_cycle`) for every one of `n_steps` steps up front.  `step` then just looks up
+    the next values and sets them in each param group.  `scales` multiplies the values for each param group: a list
+    scales the learning rate, and a dict of lists scales the hyper-parameters named by its keys.  `mom` sets the
+    `momentum` or the first of the `betas`, whichever the optimizer has.
+
+    `curves` has the values for each step, with a column for each param group, for plotting.  Like a torch scheduler
+    it has `state_dict` and `load_state_dict`, so `CheckpointCB` can save and restore it
+    """
+    def __init__(self, opt, n_steps, scales=None, **scheds):
+        self.opt,self.n_steps,self.i = opt,n_steps,0
+        if not isinstance(scales, Mapping): scales = {'lr': scales}
+        pos = torch.arange(n_steps, dtype=torch.float64)/n_steps
+        ngrp = len(opt.param_groups)
+        self.curves = {}
+        for k,f in scheds.items():
+            sc = tensor(scales[k] if scales.get(k) is not None else [1.]*ngrp, dtype=torch.float64)
+            assert len(sc)==ngrp, f'need a scale for each of the {ngrp} param groups'
+            self.curves[k] = f(pos)[:,None]*sc
+        # python floats, so a step doesn't have to make any tensors or read back from them
+        self.vals = {k:v.tolist() for k,v in self.curves.items()}
+        self._set()
+
+    def _set(self):
+        i = min(self.i, self.n_steps-1)
+        for k,vs in self.vals.items():
+            for pg,v in zip(self.opt.param_groups, vs[i]):
+                if k=='mom':
+                    if 'betas' in pg: pg['betas'] = (v, pg['betas'][1])
+                    else: pg['momentum'] = v
+                else: pg[k] = v
+
+    def step(self):
+        self.i += 1
+        self._set()
+
+    def get_last_lr(self): return [pg['lr'] for pg in self.opt.param_groups]
+    def state_dict(self): return {'i': self.i}
+    def load_state_dict(self, sd):
+        self.i = sd['i']
+        self._set()
+
+    def plot(self):
+        for k,v in self.curves.items():
+            plt.plot(v.numpy(), label=[f'{k} {i}' for i in range(v.shape[1])] if v.shape[1]>1 else k)
+            plt.legend()
+            plt.show()
+
+# %% ../nbs/12_accel_sgd.ipynb 50
 class BaseSchedCB(Callback):
     """ define the scheduler to use and assign the optimiser.  Create a basic step operation for the 
     scheduler
@@ -37,25 +121,36 @@ class BaseSchedCB(Callback):
     def _step(self, learn):
         if learn.training: self.schedo.step()
 
-# %% ../nbs/12_accel_sgd.ipynb 49
+# %% ../nbs/12_accel_sgd.ipynb 51
 class BatchSchedCB(BaseSchedCB):
-    """ step the scheduler after the batch
+    """ step the scheduler after the batch.  Instead of a torch scheduler, hyper-parameter schedules can be passed
+    as keywords (eg `lr=one_cycle(1e-2)`), which a `PrecomputedSched` works out for every optimizer step of the fit
+    (one for each training batch, or for each `accum` of them with `GradAccumCB`)
     """
+    def __init__(self, sched=None, scales=None, **scheds):
+        super().__init__(sched)
+        self.scales,self.scheds = scales,scheds
+    def before_fit(self, learn):
+        if not self.scheds: return super().before_fit(learn)
+        accum = next((cb.accum for cb in learn.cbs if isinstance(cb, GradAccumCB)), 1)
+        n_steps = learn.n_epochs*math.ceil(len(learn.dls.train)/accum)
+        self.schedo = PrecomputedSched(learn.opt, n_steps, self.scales, **self.scheds)
     def after_batch(self, learn): self._step(learn)
 
-# %% ../nbs/12_accel_sgd.ipynb 50
+# %% ../nbs/12_accel_sgd.ipynb 52
 class HasLearnCB(Callback):
     def before_fit(self, learn): self.learn = learn 
     def after_fit(self, learn): self.learn = None
 
-# %% ../nbs/12_accel_sgd.ipynb 51
+# %% ../nbs/12_accel_sgd.ipynb 53
 class RecorderCB(Callback):
-    """ Class to record specific keyword items during training
+    """ Class to record specific keyword items during training.  Each is kept in a `TimeSeries` of (at most)
+    `cap` entries
     """
-    def __init__(self, **d): 
-        self.d = d
+    def __init__(self, cap=4096, **d): 
+        self.d,self.cap = d,cap
     def before_fit(self, learn):
-        self.recs = {k:[] for k in self.d}
+        self.recs = {k:TimeSeries(self.cap) for k in self.d}
         self.pg = learn.opt.param_groups[0]
     
     def after_batch(self, learn):
@@ -65,10 +160,283 @@ class RecorderCB(Callback):
 
     def plot(self):
         for k,v in self.recs.items():
-            plt.plot(v, label=k)
+            plt.plot(v.steps, v.mean, label=k)
             plt.legend()
             plt.show()
 
-# %% ../nbs/12_accel_sgd.ipynb 59
+    def save(self, path): save_series(path, **self.recs)
+
+# %% ../nbs/12_accel_sgd.ipynb 61
 class EpochSchedCB(BaseSchedCB):
     def after_epoch(self, learn): self._step(learn)
+
+# %% ../nbs/12_accel_sgd.ipynb 77
+import threading,random
+from copy import deepcopy
+
+def _cpu_copy(o):
+    "A copy of `o` (a state dict, say) with every tensor copied to the cpu, so training can carry on changing `o`"
+    if isinstance(o, torch.Tensor): return o.detach().to('cpu', copy=True)
+    if isinstance(o, Mapping): return {k:_cpu_copy(v) for k,v in o.items()}
+    if isinstance(o, (list,tuple)): return type(o)(_cpu_copy(v) for v in o)
+    return deepcopy(o)
+
+def _rng_states():
+    "The states of the random number generators that `set_seed` seeds"
+    return dict(torch=torch.get_rng_state(), random=random.getstate(), numpy=np.random.get_state(),
+                cuda=torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None)
+
+def _set_rng_states(d):
+    torch.set_rng_state(d['torch'])
+    random.setstate(d['random'])
+    np.random.set_state(d['numpy'])
+    if d['cuda'] is not None: torch.cuda.set_rng_state_all(d['cuda'])
+
+class _SkipDL:
+    "Iterate `dl`, skipping its first `n` batches and then calling `after_skip`"
+    def __init__(self, dl, n, after_skip): self.dl,self.n,self.after_skip = dl,n,after_skip
+    def __len__(self): return len(self.dl)-self.n
+    def __iter__(self):
+        it = iter(self.dl)
+        for _ in range(self.n): next(it)
+        self.after_skip()
+        yield from it
+
+class CheckpointCB(Callback):
+    """ Save a checkpoint into `path` every `every` training batches (if set) and at the end of each training epoch,
+    keeping the newest `keep`.  A checkpoint has the model, the optimizer, the schedulers of any `BaseSchedCB`s, the
+    random number generator states and the position in the fit.
+    
+    To keep the stall in training short, the state is copied to the cpu and then written by a background thread
+    (which a new checkpoint waits for if it's still writing the last one).  An error writing a checkpoint is raised
+    when the thread is next waited for, by the next checkpoint or at the end of the fit.  The time training is
+    stalled by each checkpoint is recorded in `stalls`.
+    
+    `fit(..., resume_from=fname)` carries on from a checkpoint, even one saved part way through an epoch.  The
+    random states from the start of that epoch are restored so the training set is shuffled in the same way, and
+    the batches that had been done are skipped (they are still loaded).  It then continues with the random states
+    from when the checkpoint was saved, so the results are the same as if the fit hadn't stopped (as long as the
+    data loader doesn't use worker processes with random augmentations).  The metrics of that epoch only include
+    the batches after the checkpoint
+    """
+    order = -10
+    # `Learner.fit` checks there's a callback that can resume from a checkpoint if it's given one
+    can_resume = True
+    def __init__(self, path='checkpoints', every=None, keep=3):
+        assert keep>=1, 'keep must be at least 1'
+        fc.store_attr()
+        self.path = Path(path)
+        self.stalls = []
+        
+    @staticmethod
+    def latest(path='checkpoints'):
+        "The newest checkpoint in `path`, or None"
+        fns = sorted(Path(path).glob('ckpt-*.pth'))
+        return fns[-1] if fns else None
+
+    def before_fit(self, learn):
+        # this runs before any other callback has wrapped the model (eg in `DistributedDataParallel`)
+        self.model,self.thread,self.resume,self.error = learn.model,None,None,None
+        self.batch_done = self.epoch_done = False
+        self.scheds = [cb for cb in learn.cbs if isinstance(cb, BaseSchedCB)]
+        fn = getattr(learn, 'resume_from', None)
+        if fn is None: return
+        self.resume = torch.load(fn, weights_only=False)
+        self.model.load_state_dict(self.resume['model'])
+        learn.epochs = range(self.resume['epoch'], learn.n_epochs)
+
+    def before_epoch(self, learn):
+        if self.resume is not None and learn.training:
+            # the scheduler callbacks have all made their schedulers by now.  Making a scheduler sets the
+            # optimizer's hyper-parameters, so the optimizer's state is loaded after them
+            for cb,sd in zip(self.scheds, self.resume['scheds']): cb.schedo.load_state_dict(sd)
+            learn.opt.load_state_dict(self.resume['opt'])
+            _set_rng_states(self.resume['epoch_rng'])
+            if self.resume['iter']:
+                # `iter` counts the batches the learner saw, and `GradAccumCB` (which runs after this) makes each of
+                # those from `accum` batches of the loader wrapped here
+                accum = next((cb.accum for cb in learn.cbs if isinstance(cb, GradAccumCB)), 1)
+                learn.dl = _SkipDL(learn.dl, self.resume['iter']*accum, partial(_set_rng_states, self.resume['rng']))
+                learn.start_iter = self.resume['iter']
+            self.resume = None
+        if learn.training: self.epoch_rng = _rng_states()
+        
+    # the saving is done in the cleanup events, which come after every callback's `after_` event (and so after any
+    # scheduler has stepped), but only if the `after_` event was reached
+    def after_batch(self, learn): self.batch_done = learn.training
+    def cleanup_batch(self, learn):
+        if self.batch_done and self.every and (learn.iter+1)%self.every==0:
+            self.save(learn, learn.epoch, learn.iter+1)
+        self.batch_done = False
+
+    def after_epoch(self, learn): self.epoch_done = learn.training
+    def cleanup_epoch(self, learn):
+        if learn.training: learn.start_iter = 0
+        if self.epoch_done: self.save(learn, learn.epoch+1, 0)
+        self.epoch_done = False
+
+    def save(self, learn, epoch, it):
+        "Snapshot the state, to resume at batch `it` of `epoch`, and write it to disk on a background thread"
+        start = time.perf_counter()
+        self._join()
+        rng = _rng_states()
+        state = dict(model=_cpu_copy(self.model.state_dict()), opt=_cpu_copy(learn.opt.state_dict()),
+                     scheds=[_cpu_copy(cb.schedo.state_dict()) for cb in self.scheds],
+                     # resuming at the start of an epoch just carries on from the current random state
+                     epoch_rng=self.epoch_rng if it else rng, rng=rng, epoch=epoch, iter=it)
+        self.thread = threading.Thread(target=self._write, args=(state, self.path/f'ckpt-{epoch:04d}-{it:07d}.pth'))
+        self.thread.start()
+        self.stalls.append(time.perf_counter()-start)
+
+    def _write(self, state, fn):
+        try:
+            fn.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file and rename it, so a crash part way through never leaves a broken checkpoint
+            tmp = fn.with_suffix('.tmp')
+            torch.save(state, tmp)
+            os.replace(tmp, fn)
+            for o in sorted(self.path.glob('ckpt-*.pth'))[:-self.keep]: o.unlink()
+        # kept to be raised in the training thread, as an exception in this thread would only be printed
+        except Exception as e: self.error = e
+
+    def _join(self):
+        "Wait for the last checkpoint to be written, raising any error from writing it"
+        if self.thread is None: return
+        self.thread.join()
+        self.thread = None
+        if self.error is not None:
+            err,self.error = self.error,None
+            raise err
+
+    def cleanup_fit(self, learn):
+        learn.start_iter = 0
+        self._join()
+
+# %% ../nbs/12_accel_sgd.ipynb 85
+def _flat_views(ts, like):
+    "Copy `ts` into one flat buffer, returning it and views of it with the same shapes and strides as `like`"
+    buf = torch.empty(sum(o.numel() for o in like), dtype=like[0].dtype, device=like[0].device)
+    views,off = [],0
+    for t,p in zip(ts, like):
+        v = buf.as_strided(p.shape, p.stride(), off)
+        if t is None: v.zero_()
+        else: v.copy_(t)
+        views.append(v)
+        off += p.numel()
+    return buf,views
+
+class FlatOptimizer(optim.Optimizer):
+    """ Base class for optimizers which keep the parameters of each param group, their grads and the optimizer
+    state, in flat buffers.  The parameters, grads and state are views of the buffers (with the same strides, so
+    eg channels last weights stay that way), so an update is a few ops on a single big tensor per param group,
+    rather than a few small ops for each parameter.  Subclasses implement `opt_step(group, ps, grads, state)` for
+    the flat parameters and grads of a param group, and a dict of its flat state (made as zeros the first time
+    each of `state_names` is used).
+
+    The buffers are made at the first step (so after `DeviceCB` has moved the model), and remade if the parameters
+    or grads stop being views of them (eg if the model is moved to another device).  Parameters that don't have a
+    grad at the first step get a grad of zeros.
+    
+    Weight decay (`wd`) is applied to the weights directly, as in `SGD.reg_step` above, rather than through the
+    gradients.  With `grad_mom`, `zero_grad` multiplies the gradients by it rather than zeroing them, which is the
+    trick `MomentumLearner` uses for momentum
+    """
+    state_names = ()
+    def __init__(self, params, defaults):
+        super().__init__(params, defaults)
+        self.flats = None
+
+    def _flatten(self):
+        self.flats = []
+        for g in self.param_groups:
+            ps = [p for p in g['params'] if p.requires_grad]
+            assert len({(p.dtype,p.device) for p in ps})<=1, 'all the parameters in a group need the same dtype and device'
+            if not ps:
+                self.flats.append(None)
+                continue
+            pbuf,pviews = _flat_views([p.detach() for p in ps], ps)
+            gbuf,gviews = _flat_views([p.grad for p in ps], ps)
+            for p,pv,gv in zip(ps, pviews, gviews): p.data,p.grad = pv,gv
+            state = {}
+            for nm in self.state_names:
+                if not all(nm in self.state[p] for p in ps): continue
+                state[nm],views = _flat_views([self.state[p][nm] for p in ps], ps)
+                for p,v in zip(ps, views): self.state[p][nm] = v
+            self.flats.append((ps, pbuf, gbuf, state))
+
+    def _valid(self):
+        "Check the parameters and grads are still views of the buffers"
+        for f in self.flats:
+            if f is None: continue
+            ps,pbuf,gbuf,_ = f
+            pptr,gptr,end = pbuf.data_ptr(),gbuf.data_ptr(),pbuf.numel()*pbuf.element_size()
+            for p in ps:
+                if p.grad is None or not (0<=p.data_ptr()-pptr<end and 0<=p.grad.data_ptr()-gptr<end): return False
+        return True
+
+    def _state(self, ps, state, nm):
+        if nm not in state:
+            state[nm],views = _flat_views([None]*len(ps), ps)
+            for p,v in zip(ps, views): self.state[p][nm] = v
+        return state[nm]
+
+    @torch.no_grad()
+    def step(self, closure=None):
+        loss = None
+        if closure is not None:
+            with torch.enable_grad(): loss = closure()
+        if self.flats is None or not self._valid(): self._flatten()
+        for g,f in zip(self.param_groups, self.flats):
+            if f is None: continue
+            ps,pbuf,gbuf,state = f
+            if g['wd']: pbuf.mul_(1-g['lr']*g['wd'])
+            g['step'] = g.get('step', 0)+1
+            self.opt_step(g, pbuf, gbuf, {nm:self._state(ps, state, nm) for nm in self.state_names})
+        return loss
+
+    @torch.no_grad()
+    def zero_grad(self, set_to_none=False):
+        # the grads are never set to None, as they are views of the flat buffers
+        if self.flats is None:
+            for g in self.param_groups:
+                for p in g['params']: p.grad = None
+            return
+        for g,f in zip(self.param_groups, self.flats):
+            if f is None: continue
+            if g['grad_mom']: f[2].mul_(g['grad_mom'])
+            else: f[2].zero_()
+
+    def load_state_dict(self, state_dict):
+        super().load_state_dict(state_dict)
+        # the loaded state isn't in the buffers, so they are remade at the next step
+        self.flats = None
+
+class FlatSGD(FlatOptimizer):
+    """ SGD with optional momentum, where `momentum` is the weight of the running average of the gradients which
+    is stepped along (as in `Momentum` above), and weight decay.  The hyper-parameters have torch's names so the
+    torch schedulers (eg `OneCycleLR`, which also schedules `momentum`) work with it
+    """
+    state_names = ('grad_avg',)
+    def __init__(self, params, lr=0.1, momentum=0., wd=0., grad_mom=0.):
+        super().__init__(params, dict(lr=lr, momentum=momentum, wd=wd, grad_mom=grad_mom))
+        
+    def opt_step(self, g, p, grad, state):
+        if g['momentum']:
+            grad = state['grad_avg'].lerp_(grad, 1-g['momentum'])
+        p.add_(grad, alpha=-g['lr'])
+
+class FlatAdam(FlatOptimizer):
+    """ Adam with weight decay, giving the same results as torch's `AdamW` (which, unlike `Adam` above, adds `eps`
+    after the square root).  As for `FlatSGD` the betas are passed as torch's `betas`, so `OneCycleLR` can
+    schedule `beta1`
+    """
+    state_names = ('avg','sqr_avg')
+    def __init__(self, params, lr=1e-3, betas=(0.9,0.99), eps=1e-5, wd=0., grad_mom=0.):
+        super().__init__(params, dict(lr=lr, betas=betas, eps=eps, wd=wd, grad_mom=grad_mom))
+        
+    def opt_step(self, g, p, grad, state):
+        (beta1,beta2),i = g['betas'],g['step']
+        avg,sqr_avg = state['avg'].lerp_(grad, 1-beta1),state['sqr_avg'].mul_(beta2).addcmul_(grad, grad, value=1-beta2)
+        # p -= lr * (avg/(1-beta1**i)) / (sqrt(sqr_avg/(1-beta2**i)) + eps)
+        denom = sqr_avg.sqrt().div_(math.sqrt(1-beta2**i)).add_(g['eps'])
+        p.addcdiv_(avg, denom, value=-g['lr']/(1-beta1**i))